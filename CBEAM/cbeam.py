@@ -1,5 +1,52 @@
+import logging
 import serial
+import sys
 import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+
+_log = logging.getLogger(__name__)
+
+# Size of the GRBL serial receive buffer in bytes
+GRBL_RX_BUFFER_SIZE = 127
+
+
+def _log_response(response):
+    """
+    Log a GRBL response line, at ERROR level for error and alarm messages.
+
+    :param response: Response line without the line ending.
+    """
+    if response.startswith(('error', 'ALARM')):
+        _log.error("GRBL response: %s", response)
+    else:
+        _log.debug("GRBL response: %s", response)
+
+
+def _set_low_latency(ser):
+    """
+    Enable ASYNC_LOW_LATENCY on a Linux serial port. USB-serial adapters otherwise
+    buffer incoming data for up to 16 ms before handing it to the host.
+    Ports that do not support it are left unchanged.
+
+    :param ser: open serial.Serial instance
+    """
+    if not sys.platform.startswith('linux'):
+        return
+    try:
+        import fcntl
+        import struct
+        TIOCGSERIAL = 0x541E
+        TIOCSSERIAL = 0x541F
+        ASYNC_LOW_LATENCY = 0x2000
+        buf = bytearray(0x60)
+        fcntl.ioctl(ser.fileno(), TIOCGSERIAL, buf)
+        flags = struct.unpack_from('i', buf, 4)[0] | ASYNC_LOW_LATENCY
+        struct.pack_into('i', buf, 4, flags)
+        fcntl.ioctl(ser.fileno(), TIOCSSERIAL, buf)
+    except (OSError, ImportError):
+        pass
+
 
 class CBEAM:
     """ Class used to communicate with the CBEAM CNC machine from Openbuilds."""
@@ -15,6 +62,7 @@ class CBEAM:
         self.baudrate = baudrate
         self.timeout = timeout
         self.serial_connection = None
+        self._executor = None
 
     def connect(self):
         """
@@ -24,18 +72,37 @@ class CBEAM:
         """
         try:
             self.serial_connection = serial.Serial(self.address, self.baudrate)
+            _set_low_latency(self.serial_connection)
             time.sleep(2)  # Wait for the GRBL to initialize
             self.serial_connection.flushInput()  # Flush startup text
             return True
         except Exception as e:
-            print(f"Error connecting to GRBL: {e}")
+            _log.error("Error connecting to GRBL: %s", e)
             return False
 
     def disconnect(self):
         """Disconnect from the CBEAM device."""
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
         if self.serial_connection is not None:
             self.serial_connection.close()
 
+    def submit(self, function, *args, **kwargs) -> Future:
+        """
+        Run a method of the CBEAM device on a dedicated worker thread.
+        Calls submitted to the same device run one at a time in submission order, while
+        other devices and the calling thread keep running. Do not mix submitted calls
+        with direct calls on the same device while submitted calls are pending.
+        disconnect() waits for pending calls and stops the worker, so call it directly.
+
+        :param function: bound method of this object, e.g. cbeam.run_gcode
+        :return: Future holding the return value of the call
+        """
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1)
+        return self._executor.submit(function, *args, **kwargs)
+
     def _send_command(self, command):
         """
         Send a command to the CBEAM device.
@@ -43,26 +110,31 @@ class CBEAM:
         :param command: Command to send
         """
         if self.serial_connection is None:
-            print("No connection to GRBL. Please connect first.")
+            _log.error("No connection to GRBL. Please connect first.")
             return
 
         command = command.strip() + "\n"
         self.serial_connection.write(command.encode())
         response = self.serial_connection.readline().decode().strip()
-        print(f"GRBL response: {response}")
+        _log_response(response)
 
     def wait_for_move_complete(self):
-        """Wait for the CBEAM device to complete a move."""
+        """
+        Wait for the CBEAM device to complete a move.
+
+        A zero-length dwell (G4 P0) is queued behind the pending motion. GRBL only
+        acknowledges it once the planner buffer is empty, so the wait blocks on a single
+        response instead of repeatedly polling the status with '?'.
+        """
         if self.serial_connection is None:
-            print("No connection to GRBL. Please connect first.")
+            _log.error("No connection to GRBL. Please connect first.")
             return
 
+        self.serial_connection.write(b"G4 P0\n")
         while True:
-            self.serial_connection.write(b"?")
             response = self.serial_connection.readline().decode().strip()
-            if "Idle" in response:
+            if response == "ok" or response.startswith("error"):
                 break
-            time.sleep(0.1)
 
     def run_gcode(self, filename):
         """
@@ -70,23 +142,73 @@ class CBEAM:
 
         :param filename: Path to the G-code file
         """
-        with open(filename, 'r') as gcode_file:
-            # Read lines from the G-code file
-            for line in gcode_file:
-                # Remove comments and whitespace
-                stripped_line = line.split(';')[0].strip()
-                if not stripped_line:
-                    continue
+        self._stream(self._iter_gcode(filename))
+
+    def stream_xy(self, points, feed_rate=None):
+        """
+        Move the CBEAM device through a sequence of XY positions.
+
+        :param points: Array-like of shape (N, 2) with the X and Y positions
+        :param feed_rate: Feed rate for linear moves (G1). Rapid moves (G0) are used if not given.
+        """
+        import numpy as np
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 2).tolist()
 
-                # Send the G-code command to the CNC machine
-                self.serial_connection.write((stripped_line + '\n').encode('ascii'))
+        def lines():
+            if feed_rate is None:
+                for x, y in points:
+                    yield b"G0 X%.3f Y%.3f\n" % (x, y)
+            else:
+                yield b"G1 F%.3f\n" % float(feed_rate)
+                for x, y in points:
+                    yield b"G1 X%.3f Y%.3f\n" % (x, y)
 
-                # Wait for the CNC machine to acknowledge the command
+        self._stream(lines())
+
+    def _stream(self, lines):
+        """
+        Stream commands to the CBEAM device with the GRBL character-counting protocol.
+
+        New lines are sent as long as they fit in the GRBL receive buffer, and a response
+        is only awaited when the buffer is full. This keeps the GRBL planner saturated.
+
+        :param lines: Iterable of newline-terminated commands encoded as bytes
+        """
+        pending = deque()  # Lengths of lines sent but not yet acknowledged
+        in_flight = 0  # Total length of the pending lines
+
+        for line in lines:
+            # Wait for acknowledgements until the line fits in the GRBL buffer
+            line_length = len(line)
+            while pending and in_flight + line_length > GRBL_RX_BUFFER_SIZE:
                 response = self.serial_connection.readline().decode('ascii').strip()
-                print(f'Sent: {stripped_line}, Received: {response}')
+                in_flight -= pending.popleft()
+                _log_response(response)
 
-                # Add a short delay to ensure smooth communication
-                time.sleep(0.1)
+            # Send the G-code command to the CNC machine
+            self.serial_connection.write(line)
+            pending.append(line_length)
+            in_flight += line_length
+            _log.debug('Sent: %r', line)
+
+        # Collect the responses for the lines still in the GRBL buffer
+        while pending:
+            response = self.serial_connection.readline().decode('ascii').strip()
+            pending.popleft()
+            _log_response(response)
+
+    def _iter_gcode(self, filename):
+        """
+        Yield the G-code commands of a file, stripped of comments and whitespace.
+
+        :param filename: Path to the G-code file
+        :return: Generator of newline-terminated commands encoded as bytes, ready to send
+        """
+        with open(filename, 'rb') as gcode_file:
+            for raw_line in gcode_file:
+                line = raw_line.partition(b';')[0].strip()
+                if line:
+                    yield line + b'\n'
 
     def set_unlock(self):
         """Unlock the CBEAM device."""
@@ -1,5 +1,36 @@
+import logging
 import serial
+import sys
 import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+_log = logging.getLogger(__name__)
+
+
+def _set_low_latency(ser):
+    """
+    Enable ASYNC_LOW_LATENCY on a Linux serial port. USB-serial adapters otherwise
+    buffer incoming data for up to 16 ms before handing it to the host.
+    Ports that do not support it are left unchanged.
+
+    :param ser: open serial.Serial instance
+    """
+    if not sys.platform.startswith('linux'):
+        return
+    try:
+        import fcntl
+        import struct
+        TIOCGSERIAL = 0x541E
+        TIOCSSERIAL = 0x541F
+        ASYNC_LOW_LATENCY = 0x2000
+        buf = bytearray(0x60)
+        fcntl.ioctl(ser.fileno(), TIOCGSERIAL, buf)
+        flags = struct.unpack_from('i', buf, 4)[0] | ASYNC_LOW_LATENCY
+        struct.pack_into('i', buf, 4, flags)
+        fcntl.ioctl(ser.fileno(), TIOCSSERIAL, buf)
+    except (OSError, ImportError):
+        pass
+
 
 class ITLA:
     """
@@ -19,6 +50,13 @@ class ITLA:
         self.baudrate = baudrate
         self.timeout = timeout
         self.ser = None
+        self._executor = None
+
+        # Operating limits of the laser, read once in connect()
+        self.min_power = None
+        self.max_power = None
+        self.min_frequency = None
+        self.max_frequency = None
 
         # List of registers used for controlling the ITLA
         self.WRITE = 0x01
@@ -41,26 +79,65 @@ class ITLA:
 
     def connect(self) -> int:
         """
-        Connect to the laser via serial port.
+        Connect to the laser via serial port and read its power and frequency limits.
         """
         try:
             self.ser = serial.Serial(self.address, self.baudrate, timeout=self.timeout)
-            return 0
+            _set_low_latency(self.ser)
         except serial.SerialException:
-            print("Could not open serial port")
+            _log.error("Could not open serial port")
             return -1
 
+        # Cache the operating limits used to range-check set_power and set_frequency_THz.
+        # The six reads are submitted back-to-back, and the limits are left as None if any of them fails.
+        registers = (self.REG_Opsl, self.REG_Opsh, self.REG_lfl1, self.REG_lfl2, self.REG_lfh1, self.REG_lfh2)
+        for register in registers:
+            self._submit(register,0,self.READ)
+        responses = [self._receive_response() for _ in registers]
+        if any(response[0] == 0xFF for response in responses):
+            _log.error("Could not read the power and frequency limits")
+            # Close the port so that calling connect again does not leave this handle open
+            self.ser.close()
+            self.ser = None
+            return -1
+        opsl, opsh, lfl1, lfl2, lfh1, lfh2 = [256*response[2]+response[3] for response in responses]
+        self.min_power = opsl/100.0
+        self.max_power = opsh/100.0
+        self.min_frequency = lfl1+lfl2/10000.0
+        self.max_frequency = lfh1+lfh2/10000.0
+        return 0
+
     def disconnect(self) -> int:
         """
         Disconnect from the laser.
         """
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+        if self.ser is None:
+            return 0
         try:
             self.ser.close()
             return 0
         except serial.SerialException:
-            print("Could not close serial port")
+            _log.error("Could not close serial port")
             return -1
 
+    def submit(self, function, *args, **kwargs) -> Future:
+        """
+        Run a method of the laser on a dedicated worker thread.
+        Calls submitted to the same device run one at a time in submission order, while
+        other devices and the calling thread keep running. Do not mix submitted calls
+        with direct calls on the same device while submitted calls are pending.
+        disconnect() waits for pending calls and stops the worker, so call it directly.
+
+        :param function: bound method of this object, e.g. laser.get_power
+        :return: Future holding the return value of the call
+        """
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1)
+        return self._executor.submit(function, *args, **kwargs)
+
 
 
     def _issue_command(self,register:int, data:int, rw:int) -> int:
@@ -70,21 +147,35 @@ class ITLA:
         :param data: data to be written to the register
         :param rw: read (0) or write(1)
         """
+        self._submit(register, data, rw)
+        return self._await_response()
 
-        data_bytes = '{0:016b}'.format(data)
-        byte2 = int(data_bytes[0:8],2) #int(data/256)
-        byte3 = int(data_bytes[8:16],2) #int(data-byte2*256)
+    def _submit(self, register:int, data:int, rw:int) -> None:
+        """
+        Send a command to the laser without waiting for the response.
+        Several commands can be submitted back-to-back and their responses collected
+        in the same order with _await_response.
+        :param register: register number
+        :param data: data to be written to the register
+        :param rw: read (0) or write(1)
+        """
+        byte2 = (data >> 8) & 0xFF # high byte of data
+        byte3 = data & 0xFF # low byte of data
         byte0 = int(self._checksum(rw, register, byte2, byte3))*16+rw
 
         # Send the command
         self._send_command(byte0, register, byte2, byte3)
 
+    def _await_response(self) -> int:
+        """
+        Receive and decode the response to the oldest submitted command.
+        """
         # Receive the command
         response = self._receive_response()
 
         # Check for AEA
         if (response[0]&0x03) == 0x02:
-            print("AEA flag")
+            _log.warning("AEA flag")
 
         # Decode the response
         self._decode_response(response)
@@ -97,7 +188,7 @@ class ITLA:
         :param response: response from the laser
         """
         if response[0] == 0xFF:
-            print("Error in response")
+            _log.error("Error in response")
             return -1
         else:
             return response[2]*256+response[3]
@@ -118,29 +209,27 @@ class ITLA:
         """
         Receive a response with 4 bytes from the laser.
         """
-        tstart = time.time()
-        while self.ser.inWaiting() < 4:
-            if time.time()-tstart > self.timeout:
-                print("Timeout")
-                break
-            time.sleep(0.0001)
-
+        # The port is opened with a timeout, so read blocks until 4 bytes arrive or the timeout expires.
+        # pyserial waits in the kernel with the GIL released, so other threads keep running.
         try:
-            byte0 = ord(self.ser.read(1))
-            byte1 = ord(self.ser.read(1))
-            byte2 = ord(self.ser.read(1))
-            byte3 = ord(self.ser.read(1))
-        except:
-            print("Could not read response")
-            byte0 = 0xFF
-            byte1 = 0xFF
-            byte2 = 0xFF
-            byte3 = 0xFF
+            data = self.ser.read(4)
+        except serial.SerialException:
+            _log.error("Could not read response")
+            return [0xFF, 0xFF, 0xFF, 0xFF]
+        if len(data) < 4:
+            _log.error("Timeout")
+            # Drop the partial frame. A response arriving late would otherwise be read as the
+            # response to the next command, and every later response would be off by one.
+            self.ser.reset_input_buffer()
+            return [0xFF, 0xFF, 0xFF, 0xFF]
+
+        byte0, byte1, byte2, byte3 = data
         if self._checksum(byte0, byte1, byte2, byte3) == (byte0)>>4:
-            print("Checksum OK")
+            _log.debug("Checksum OK")
             return [byte0, byte1, byte2, byte3]
         else:
-            print("Checksum Error!")
+            _log.error("Checksum Error!")
+            self.ser.reset_input_buffer()
             return [0xFF, 0xFF, 0xFF, 0xFF]
 
     def _wait_until_no_operation(self) -> int:
@@ -151,10 +240,10 @@ class ITLA:
         data=[]
 
         while data != 16:
-            print("Waiting for laser to be ready")
+            _log.info("Waiting for laser to be ready")
             data = self._issue_command(register,0,0)
             time.sleep(1)
-        print("Laser ready")
+        _log.info("Laser ready")
         return data
 
 
@@ -203,6 +292,9 @@ class ITLA:
         register = self.REG_Power
         data = 100*power # per operating guide
 
+        if self.min_power is None:
+            _log.error("Power limits unknown, connect first")
+            return -1
         if power >self.min_power and power<=self.max_power:
             try:
                 self._issue_command(register, data,self.WRITE)
@@ -210,7 +302,7 @@ class ITLA:
             except:
                 return -1
         else:
-            print("Power out of range")
+            _log.error("Power out of range")
             return -1
 
     def get_power(self) -> int:
@@ -225,16 +317,21 @@ class ITLA:
         Set the frequency of the laser.
         :param frequency: frequency in THz
         """
+        if self.min_frequency is None:
+            _log.error("Frequency limits unknown, connect first")
+            return -1
         if frequency >self.min_frequency and frequency<=self.max_frequency:
             register1 = self.REG_fcf1
             register2 = self.REG_fcf2
             data_THz = int(frequency)
             data_GHz = int((frequency-data_THz)*10000) # per operating guide fcf2 has data in 10*GHz
-            self._issue_command(register1, data_THz,self.WRITE)
-            self._issue_command(register2, data_GHz,self.WRITE)
+            self._submit(register1, data_THz,self.WRITE)
+            self._submit(register2, data_GHz,self.WRITE)
+            self._await_response()
+            self._await_response()
             return 0
         else:
-            print(f"Frequency out of range (min: {self.min_frequency} THz, max: {self.max_frequency} THz)")
+            _log.error("Frequency out of range (min: %s THz, max: %s THz)", self.min_frequency, self.max_frequency)
             return -1
 
     def get_frequency_THz(self) -> float:
@@ -243,8 +340,10 @@ class ITLA:
         """
         register1 = self.REG_fcf1
         register2 = self.REG_fcf2
-        data_THz=self._issue_command(register1, 0,self.READ)
-        data_GHz = self._issue_command(register2, 0,self.READ)
+        self._submit(register1, 0,self.READ)
+        self._submit(register2, 0,self.READ)
+        data_THz = self._await_response()
+        data_GHz = self._await_response()
         return data_THz+data_GHz/10000
 
     def set_wavelength_nm(self, wavelength: int) -> int:
@@ -252,7 +351,7 @@ class ITLA:
         Set the wavelength of the laser.
         :param wavelength: wavelength in nm
         """
-        frequency_THz=299792458/(wavelength*1e3)
+        frequency_THz=299792.458/wavelength
         return self.set_frequency_THz(frequency_THz)
 
     def get_wavelength_nm(self, wavelength:int) -> int:
@@ -260,7 +359,36 @@ class ITLA:
         Get the wavelength of the laser.
         """
         frequency_THz=self.get_frequency_THz()
-        return 299792458/(frequency_THz*1e12)*1e9
+        return 299792.458/frequency_THz
+
+    def batch_set_wavelengths(self, wavelengths_nm, dwell: float = 0) -> int:
+        """
+        Step the laser through a sequence of wavelengths.
+        The register values for all points are computed up front, and the two frequency
+        registers of each point are written back-to-back before the responses are read.
+        :param wavelengths_nm: sequence or array of wavelengths in nm
+        :param dwell: time in seconds to stay at each wavelength
+        """
+        if self.min_frequency is None:
+            _log.error("Frequency limits unknown, connect first")
+            return -1
+        # Only batch_set_wavelengths needs numpy
+        import numpy as np
+        frequency_THz = 299792.458/np.asarray(wavelengths_nm, dtype=np.float64)
+        if np.any(frequency_THz <= self.min_frequency) or np.any(frequency_THz > self.max_frequency):
+            _log.error("Frequency out of range (min: %s THz, max: %s THz)", self.min_frequency, self.max_frequency)
+            return -1
+
+        data_THz = frequency_THz.astype(np.int64)
+        data_GHz = ((frequency_THz-data_THz)*10000).astype(np.int64) # per operating guide fcf2 has data in 10*GHz
+        for thz, ghz in zip(data_THz.tolist(), data_GHz.tolist()):
+            self._submit(self.REG_fcf1, thz, self.WRITE)
+            self._submit(self.REG_fcf2, ghz, self.WRITE)
+            self._await_response()
+            self._await_response()
+            if dwell > 0:
+                time.sleep(dwell)
+        return 0
 
     def get_temperature(self) -> float:
         """
@@ -297,8 +425,10 @@ class ITLA:
         """
         register1 = self.REG_lfl1
         register2 = self.REG_lfl2
-        data_THz = self._issue_command(register1,0,self.READ)
-        data_GHz = self._issue_command(register2,0,self.READ)
+        self._submit(register1,0,self.READ)
+        self._submit(register2,0,self.READ)
+        data_THz = self._await_response()
+        data_GHz = self._await_response()
         return data_THz+data_GHz/10000.0
 
     def get_max_frequency_THz(self)-> float:
@@ -307,8 +437,10 @@ class ITLA:
         """
         register1 = self.REG_lfh1
         register2 = self.REG_lfh2
-        data_THz = self._issue_command(register1,0,self.READ)
-        data_GHz = self._issue_command(register2,0,self.READ)
+        self._submit(register1,0,self.READ)
+        self._submit(register2,0,self.READ)
+        data_THz = self._await_response()
+        data_GHz = self._await_response()
         return data_THz+data_GHz/10000.0
 
     def set_mode(self, mode: int) -> int:
@@ -1,10 +1,12 @@
 import ctypes
-from typing import List, Any, Tuple
+import numpy as np
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import List, Any, Optional, Tuple
 
 # Define the ctypes for the required data types
 ViStatus = ctypes.c_long
 ViRsrc = ctypes.c_char_p
-ViBoolean = ctypes.c_bool
+ViBoolean = ctypes.c_uint16  # unsigned short in visatype.h
 ViSession = ctypes.c_long
 ViPSession = ctypes.POINTER(ctypes.c_long)
 ViPUInt32 = ctypes.POINTER(ctypes.c_uint32)
@@ -23,6 +25,8 @@ NUM_PIXELS= 3648
 
 class DLLWrapper:
     def __init__(self, dll_path: str):
+        # Functions of a CDLL release the GIL for the duration of each call, so blocking
+        # driver calls such as tlccs_getScanData do not stall other Python threads
         self._dll = ctypes.CDLL(dll_path)
 
     def _bind_functions(self, function_bindings: List[Tuple[str, List[Any], Any]]) -> None:
@@ -51,6 +55,14 @@ class TLCCS(DLLWrapper):
                 ("tlccs_getWavelengthData", [ViSession, ViInt16, ctypes.POINTER(ViReal64), ViPReal64, ViPReal64], ViStatus)
         ])
 
+        # Output buffers reused by get_scan_data and get_wavelength_data
+        self._scan_buf = np.empty(NUM_PIXELS, dtype=np.float64)
+        self._scan_buf_ptr = self._scan_buf.ctypes.data_as(ctypes.POINTER(ViReal64))
+        self._wl_buf = np.empty(NUM_PIXELS, dtype=np.float64)
+        self._wl_buf_ptr = self._wl_buf.ctypes.data_as(ctypes.POINTER(ViReal64))
+
+        self._executor = None
+
     def init(self, resource_name: str, id_query: bool, reset_device: bool) -> int:
         """
         Initializes the instrument driver session and performs the following initialization actions:
@@ -100,7 +112,7 @@ class TLCCS(DLLWrapper):
         instrument_driver_revision = ctypes.create_string_buffer(256)  # Added buffer
 
         status = self._dll.tlccs_identificationQuery(
-            ViSession(instrument_handle),
+            instrument_handle,
             manufacturer_name,
             device_name,
             serial_number,
@@ -108,7 +120,7 @@ class TLCCS(DLLWrapper):
             instrument_driver_revision  # Added buffer as argument
         )
 
-        self.__test_for_error(ViSession(instrument_handle), status)
+        self.__test_for_error(instrument_handle, status)
 
         return (
             manufacturer_name.value.decode(),
@@ -126,9 +138,27 @@ class TLCCS(DLLWrapper):
 
         :raises NameError: If there is an error during the close operation.
         """
-        status = self._dll.tlccs_close(ViSession(instrument_handle))
-        self.__test_for_error(ViSession(instrument_handle), status)
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+        status = self._dll.tlccs_close(instrument_handle)
+        self.__test_for_error(instrument_handle, status)
         return None
+
+    def submit(self, function, *args, **kwargs) -> Future:
+        """
+        Run a method of the spectrometer on a dedicated worker thread.
+        Calls submitted to the same device run one at a time in submission order, while
+        other devices and the calling thread keep running. Do not mix submitted calls
+        with direct calls on the same device while submitted calls are pending.
+        close() waits for pending calls and stops the worker, so call it directly.
+
+        :param function: bound method of this object, e.g. ccs.get_scan_data
+        :return: Future holding the return value of the call
+        """
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1)
+        return self._executor.submit(function, *args, **kwargs)
     
     def set_integration_time(self, instrument_handle: int, integration_time: float) -> None:
         """
@@ -144,11 +174,11 @@ class TLCCS(DLLWrapper):
         .. note:: This function sets the optical integration time in seconds [s].
         """
         status = self._dll.tlccs_setIntegrationTime(
-            ViSession(instrument_handle),
+            instrument_handle,
             ViReal64(integration_time)
         )
 
-        self.__test_for_error(ViSession(instrument_handle), status)
+        self.__test_for_error(instrument_handle, status)
         return None
     
 
@@ -164,37 +194,46 @@ class TLCCS(DLLWrapper):
         .. note:: The scan data can be read out with the function 'Get Scan Data'. Use 'Get Device Status' to check the scan status.
         """
         status = self._dll.tlccs_startScan(
-            ViSession(instrument_handle)
+            instrument_handle
         )
 
-        self.__test_for_error(ViSession(instrument_handle), status)
+        self.__test_for_error(instrument_handle, status)
         return None
     
-    def get_scan_data(self, instrument_handle: int) -> List[float]:
+    def get_scan_data(self, instrument_handle: int, out: Optional[np.ndarray] = None) -> np.ndarray:
         """
         Reads out the processed scan data.
 
         :param instrument_handle: The instrument handle returned by <Initialize> to select the desired instrument driver session.
         :type instrument_handle: int
+        :param out: Optional C-contiguous float64 array with NUM_PIXELS elements, e.g. a row of a preallocated 2D array. The driver writes the scan directly into it.
+        :type out: numpy.ndarray
 
-        :return: A list containing the processed scan data.
-        :rtype: List[float]
+        :return: An array containing the processed scan data. Without out, the array is reused by the next call, copy it to keep the data.
+        :rtype: numpy.ndarray
 
         :raises NameError: If there is an error during the get scan data operation, or if the raw scan data is overexposed and proper data processing is not possible.
+        :raises ValueError: If out does not have the required shape, dtype or memory layout.
 
         .. note:: When the raw scan data is overexposed, so that a proper data processing is not possible, the function returns VI_ERROR_SCAN_DATA_INVALID and all data points are set to zero (0.0).
         """
-        scan_data = (ViReal64 * NUM_PIXELS)()
+        if out is None:
+            out = self._scan_buf
+            data_ptr = self._scan_buf_ptr
+        else:
+            if out.dtype != np.float64 or out.size != NUM_PIXELS or not out.flags.c_contiguous or not out.flags.writeable:
+                raise ValueError(f"out must be a writeable C-contiguous float64 array with {NUM_PIXELS} elements")
+            data_ptr = out.ctypes.data_as(ctypes.POINTER(ViReal64))
 
         status = self._dll.tlccs_getScanData(
-            ViSession(instrument_handle),
-            scan_data
+            instrument_handle,
+            data_ptr
         )
 
-        self.__test_for_error(ViSession(instrument_handle), status)
-        return list(scan_data)
+        self.__test_for_error(instrument_handle, status)
+        return out
     
-    def get_wavelength_data(self, instrument_handle: int, data_set: int) -> Tuple[List[float], float, float]:
+    def get_wavelength_data(self, instrument_handle: int, data_set: int) -> Tuple[np.ndarray, float, float]:
         """
         Returns data for the pixel-wavelength correlation, including maximum and minimum wavelengths.
 
@@ -203,27 +242,26 @@ class TLCCS(DLLWrapper):
         :param data_set: Specifies which calibration data set has to be used for generating the wavelength data array.
         :type data_set: int
 
-        :return: A tuple containing the wavelength data array, the minimum wavelength, and the maximum wavelength.
-        :rtype: Tuple[List[float], float, float]
+        :return: A tuple containing the wavelength data array, the minimum wavelength, and the maximum wavelength. The array is reused by the next call, copy it to keep the data.
+        :rtype: Tuple[numpy.ndarray, float, float]
 
         :raises NameError: If there is an error during the get wavelength data operation.
 
         .. note:: The value returned in Wavelength_Data_Array[0] is the wavelength at pixel 1, this is also the minimum wavelength, the value returned in Wavelength_Data_Array[1] is the wavelength at pixel 2 and so on until Wavelength_Data_Array[CCS_SERIES_NUM_PIXELS-1] which provides the wavelength at pixel CCS_SERIES_NUM_PIXELS (3648). This is the maximum wavelength.
         """
-        wavelength_data_array = (ViReal64 * NUM_PIXELS)()
         minimum_wavelength = ViReal64()
         maximum_wavelength = ViReal64()
 
         status = self._dll.tlccs_getWavelengthData(
-            ViSession(instrument_handle),
+            instrument_handle,
             ViInt16(data_set),
-            wavelength_data_array,
+            self._wl_buf_ptr,
             ctypes.byref(minimum_wavelength),
             ctypes.byref(maximum_wavelength)
         )
 
-        self.__test_for_error(ViSession(instrument_handle), status)
-        return list(wavelength_data_array), minimum_wavelength.value, maximum_wavelength.value
+        self.__test_for_error(instrument_handle, status)
+        return self._wl_buf, minimum_wavelength.value, maximum_wavelength.value
 
     def __test_for_error(self, instrument_handle, status):
         if status < 0:
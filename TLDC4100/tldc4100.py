@@ -1,10 +1,10 @@
 import ctypes
-from typing import List, Any, Tuple
+from typing import List, Any, Sequence, Tuple
 
 # Define the ctypes for the required data types
 ViStatus = ctypes.c_long
 ViRsrc = ctypes.c_char_p
-ViBoolean = ctypes.c_int
+ViBoolean = ctypes.c_uint16  # unsigned short in visatype.h
 ViSession = ctypes.c_long
 ViPSession = ctypes.POINTER(ctypes.c_long)
 ViPUInt32 = ctypes.POINTER(ctypes.c_uint32)
@@ -18,6 +18,9 @@ ViPInt32 = ctypes.POINTER(ctypes.c_int32)
 ViReal32 = ctypes.c_float
 ViUInt16 = ctypes.c_uint16
 
+ALL_CHANNELS = -1
+NUM_CHANNELS = 4
+
 
 class DLLWrapper:
     def __init__(self, dll_path: str):
@@ -49,6 +52,14 @@ class TLDC4100(DLLWrapper):
 
         ])
 
+        # Output buffers reused by the query functions
+        self._buf_a = ctypes.create_string_buffer(256)
+        self._buf_b = ctypes.create_string_buffer(256)
+        self._buf_c = ctypes.create_string_buffer(256)
+        self._buf_d = ctypes.create_string_buffer(256)
+        self._err_buf = ctypes.create_string_buffer(512)
+        self._head_type = ViInt32()
+
     def init(self, resource_name: str, id_query: bool, reset_device: bool) -> int:
         """
         Initializes the instrument driver session and performs the following initialization actions:
@@ -70,12 +81,12 @@ class TLDC4100(DLLWrapper):
         :raises NameError: If there is an error during initialization.
         """
         instrument_handle = ViSession()
-        status = self._dll.TLDC4100_init(ViRsrc(resource_name.encode()),
-                                      ViBoolean(id_query),
-                                      ViBoolean(reset_device),
+        status = self._dll.TLDC4100_init(resource_name.encode(),
+                                      id_query,
+                                      reset_device,
                                       ctypes.byref(instrument_handle))
         
-        self._test_for_error(instrument_handle, status)
+        self.__test_for_error(instrument_handle, status)
         return instrument_handle.value
 
 
@@ -88,8 +99,8 @@ class TLDC4100(DLLWrapper):
 
         :raises NameError: If there is an error during the close operation.
         """
-        status = self._dll.TLDC4100_close(ViSession(instrument_handle))
-        self._test_for_error(instrument_handle, status)
+        status = self._dll.TLDC4100_close(instrument_handle)
+        self.__test_for_error(instrument_handle, status)
         return None
 
     def identification_query(self, instrument_handle: int) -> Tuple[str, str, str, str]:
@@ -104,26 +115,26 @@ class TLDC4100(DLLWrapper):
 
         :raises NameError: If there is an error during the identification query operation.
         """
-        manufacturer_name = ctypes.create_string_buffer(256)
-        device_name = ctypes.create_string_buffer(256)
-        serial_number = ctypes.create_string_buffer(256)
-        firmware_revision = ctypes.create_string_buffer(256)
+        manufacturer_name = self._buf_a
+        device_name = self._buf_b
+        serial_number = self._buf_c
+        firmware_revision = self._buf_d
 
         status = self._dll.TLDC4100_identificationQuery(
-            ViSession(instrument_handle),
+            instrument_handle,
             manufacturer_name,
             device_name,
             serial_number,
             firmware_revision
         )
 
-        self.__test_for_error(ViSession(instrument_handle), status)
+        self.__test_for_error(instrument_handle, status)
 
         return (
-            manufacturer_name.value.decode(),
-            device_name.value.decode(),
-            serial_number.value.decode(),
-            firmware_revision.value.decode()
+            ctypes.string_at(manufacturer_name).decode(),
+            ctypes.string_at(device_name).decode(),
+            ctypes.string_at(serial_number).decode(),
+            ctypes.string_at(firmware_revision).decode()
         )
 
     def get_head_info(self, instrument_handle: int, channel: int) -> Tuple[str, str, int]:
@@ -142,25 +153,54 @@ class TLDC4100(DLLWrapper):
 
         :raises NameError: If there is an error during the get_head_info operation.
         """
-        serial_number = ctypes.create_string_buffer(256)
-        name = ctypes.create_string_buffer(256)
-        led_head_type = ViInt32()
+        serial_number = self._buf_a
+        name = self._buf_b
+        led_head_type = self._head_type
 
         status = self._dll.TLDC4100_getHeadInfo(
-            ViSession(instrument_handle),
-            ViInt32(channel),
+            instrument_handle,
+            channel,
             serial_number,
             name,
             ctypes.byref(led_head_type)
         )
 
-        self.__test_for_error(ViSession(instrument_handle), status)
+        self.__test_for_error(instrument_handle, status)
 
         return (
-            serial_number.value.decode(),
-            name.value.decode(),
+            ctypes.string_at(serial_number).decode(),
+            ctypes.string_at(name).decode(),
             led_head_type.value
         )
+
+    def get_all_head_info(self, instrument_handle: int) -> List[Tuple[str, str, int]]:
+        """
+        Returns the LED head identification information for all channels.
+
+        :param instrument_handle: The instrument handle returned by <Initialize> to select the desired instrument driver session.
+        :type instrument_handle: int
+
+        :return: A list with the serial number, name, and type of the connected LED head for each channel, in channel order.
+        :rtype: List[Tuple[str, str, int]]
+
+        :raises NameError: If there is an error during the get_head_info operation.
+        """
+        get_head_info = self._dll.TLDC4100_getHeadInfo
+        serial_number = self._buf_a
+        name = self._buf_b
+        led_head_type = self._head_type
+        led_head_type_ref = ctypes.byref(led_head_type)
+
+        head_info = []
+        for channel in range(NUM_CHANNELS):
+            status = get_head_info(instrument_handle, channel, serial_number, name, led_head_type_ref)
+            self.__test_for_error(instrument_handle, status)
+            head_info.append((
+                ctypes.string_at(serial_number).decode(),
+                ctypes.string_at(name).decode(),
+                led_head_type.value
+            ))
+        return head_info
     
     def set_led_on_off(self, instrument_handle: int, channel: int, led_on_off: bool) -> None:
         """
@@ -178,12 +218,12 @@ class TLDC4100(DLLWrapper):
         :raises NameError: If there is an error during the set_led_on_off operation.
         """
         status = self._dll.TLDC4100_setLedOnOff(
-            ViSession(instrument_handle),
-            ViInt32(channel),
-            ViBoolean(led_on_off)
+            instrument_handle,
+            channel,
+            led_on_off
         )
 
-        self.__test_for_error(ViSession(instrument_handle), status)
+        self.__test_for_error(instrument_handle, status)
         return None
     
     def set_percental_brightness(self, instrument_handle: int, channel: int, brightness: float) -> None:
@@ -204,24 +244,50 @@ class TLDC4100(DLLWrapper):
         :raises NameError: If there is an error during the set_percental_brightness operation.
         """
         status = self._dll.TLDC4100_setPercentalBrightness(
-            ViSession(instrument_handle),
-            ViInt32(channel),
-            ViReal32(brightness)
+            instrument_handle,
+            channel,
+            brightness
         )
 
-        self.__test_for_error(ViSession(instrument_handle), status)
+        self.__test_for_error(instrument_handle, status)
         return None
 
 
+    def set_percental_brightness_array(self, instrument_handle: int, brightnesses: Sequence[float]) -> None:
+        """
+        Sets the percental brightness of several LED channels, starting at channel 0. If a value is given for every channel and all values are equal, a single call with ALL_CHANNELS is made.
+
+        :param instrument_handle: The instrument handle returned by <Initialize> to select the desired instrument driver session.
+        :type instrument_handle: int
+        :param brightnesses: The percental brightness for each channel, in channel order.
+                             Range: 0.0..100.0 (%)
+        :type brightnesses: Sequence[float]
+
+        :raises ValueError: If more than NUM_CHANNELS values are given.
+        :raises NameError: If there is an error during the set_percental_brightness operation.
+        """
+        if len(brightnesses) > NUM_CHANNELS:
+            raise ValueError(f"At most {NUM_CHANNELS} brightness values can be set, got {len(brightnesses)}.")
+        set_brightness = self._dll.TLDC4100_setPercentalBrightness
+        if len(brightnesses) == NUM_CHANNELS and len(set(brightnesses)) == 1:
+            status = set_brightness(instrument_handle, ALL_CHANNELS, brightnesses[0])
+            self.__test_for_error(instrument_handle, status)
+            return None
+
+        for channel, brightness in enumerate(brightnesses):
+            status = set_brightness(instrument_handle, channel, brightness)
+            self.__test_for_error(instrument_handle, status)
+        return None
+
     def __test_for_error(self, instrument_handle, status):
         if status < 0:
             self.__throw_error(instrument_handle, status)
             
 
     def __throw_error(self,instrument_handle, status):
-        error_message = ctypes.create_string_buffer(512)
+        error_message = self._err_buf
         if status < 0:
             self._dll.TLDC4100_error_message(instrument_handle,
                                          status, 
                                          error_message)
-            raise NameError(error_message.value.decode())
+            raise NameError(ctypes.string_at(error_message).decode())
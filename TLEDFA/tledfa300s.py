@@ -1,5 +1,50 @@
+import re
 import serial
-import time
+import sys
+
+# Upper bound on the size of a single response in bytes
+RESPONSE_MAX_SIZE = 4096
+
+_FLOAT_RE = re.compile(rb"[-+]?\d*\.?\d+(?:[eE][-+]?\d+)?")
+
+
+def _set_low_latency(ser):
+    """
+    Enable ASYNC_LOW_LATENCY on a Linux serial port. USB-serial adapters otherwise
+    buffer incoming data for up to 16 ms before handing it to the host.
+    Ports that do not support it are left unchanged.
+
+    :param ser: open serial.Serial instance
+    """
+    if not sys.platform.startswith('linux'):
+        return
+    try:
+        import fcntl
+        import struct
+        TIOCGSERIAL = 0x541E
+        TIOCSSERIAL = 0x541F
+        ASYNC_LOW_LATENCY = 0x2000
+        buf = bytearray(0x60)
+        fcntl.ioctl(ser.fileno(), TIOCGSERIAL, buf)
+        flags = struct.unpack_from('i', buf, 4)[0] | ASYNC_LOW_LATENCY
+        struct.pack_into('i', buf, 4, flags)
+        fcntl.ioctl(ser.fileno(), TIOCSSERIAL, buf)
+    except (OSError, ImportError):
+        pass
+
+
+def _parse_float(response):
+    """
+    Return the first number in a device response.
+
+    :param bytes response: Response from the device.
+    :rtype: float
+    :raises ValueError: If the response does not contain a number.
+    """
+    match = _FLOAT_RE.search(response)
+    if match is None:
+        raise ValueError(f"No number in response: {response!r}")
+    return float(match.group())
 
 
 class EDFA300S:
@@ -13,20 +58,54 @@ class EDFA300S:
 
         :param str port: Serial port of the device.
         """
-        self.ser = serial.Serial(port, baudrate=115200, bytesize=8, parity='N', stopbits=1, timeout=1)
+        # A multi-line response is complete once the device has been silent for inter_byte_timeout
+        self.ser = serial.Serial(port, baudrate=115200, bytesize=8, parity='N', stopbits=1, timeout=1,
+                                 inter_byte_timeout=0.01, write_timeout=1)
+        _set_low_latency(self.ser)
+        if hasattr(self.ser, 'set_buffer_size'):
+            # Only available on Windows
+            self.ser.set_buffer_size(rx_size=RESPONSE_MAX_SIZE, tx_size=RESPONSE_MAX_SIZE)
 
-    def send_command(self, command):
+    def send_command(self, command, multiline=False):
         """
         Send a command to the device and return the response.
 
         :param str command: Command to send.
+        :param bool multiline: Whether the response can span several lines, see send_command_bytes.
         :return: Response from the device.
         :rtype: str
         """
-        self.ser.write((command + '\r').encode())
-        time.sleep(0.1)
-        response = self.ser.read_all().decode()
-        return response.strip()
+        return self.send_command_bytes(command, multiline).decode()
+
+    def send_command_bytes(self, command, multiline=False):
+        """
+        Send a command to the device and return the undecoded response.
+
+        A single-line response is returned as soon as its carriage return arrives. A multi-line
+        response, such as the one to Help, is read until the device has been silent for the
+        port's inter_byte_timeout.
+
+        :param str command: Command to send.
+        :param bool multiline: Whether the response can span several lines.
+        :return: Response from the device, stripped of surrounding whitespace.
+        :rtype: bytes
+        """
+        self.ser.write(command.encode() + b'\r')
+        if multiline:
+            return self.ser.read(RESPONSE_MAX_SIZE).strip()
+        return self.ser.read_until(b'\r', RESPONSE_MAX_SIZE).strip()
+
+    def send_commands(self, commands):
+        """
+        Send several commands in a single write and return their responses.
+        Each command must produce a single-line response terminated by a carriage return.
+
+        :param list commands: Commands to send.
+        :return: Responses from the device, in the same order as the commands.
+        :rtype: list
+        """
+        self.ser.write(b''.join(command.encode() + b'\r' for command in commands))
+        return [self.ser.read_until(b'\r').decode().strip() for _ in commands]
 
     def help(self):
         """
@@ -35,7 +114,7 @@ class EDFA300S:
         :return: Help information.
         :rtype: str
         """
-        return self.send_command("Help")
+        return self.send_command("Help", multiline=True)
 
     def enable_laser(self):
         """
@@ -69,10 +148,11 @@ class EDFA300S:
         """
         Get the current laser diode current.
 
-        :return: Laser diode current.
-        :rtype: str
+        :return: Laser diode current (in mA).
+        :rtype: float
+        :raises ValueError: If the response does not contain a number.
         """
-        return self.send_command("gloc")
+        return _parse_float(self.send_command_bytes("gloc"))
 
     def get_status(self):
         """
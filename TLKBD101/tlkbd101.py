@@ -1,13 +1,16 @@
 import os
 import time
-import sys
 import ctypes
+import functools
 
 DWORD = ctypes.c_ulong
 WORD = ctypes.c_ushort
 
 POLLTIME = 100 # in milliseconds
 
+# Loaded DLLs keyed by (dll_path, dll_name), shared by all instances
+_DLL_CACHE = {}
+
 class TLKBD101:
     """
     A class to control the Thorlabs KBD101 brushless DC motor.
@@ -22,11 +25,20 @@ class TLKBD101:
         self.serial_number = str(serial_number)
         self.sn_ptr = ctypes.c_char_p(self.serial_number.encode('ascii'))
 
-        if sys.version_info < (3, 8):
-            os.chdir(dll_path)
-        else:
-            os.add_dll_directory(dll_path)
-        self._dll = ctypes.cdll.LoadLibrary("Thorlabs.MotionControl.KCube.BrushlessMotor.dll")
+        key = (dll_path, "Thorlabs.MotionControl.KCube.BrushlessMotor.dll")
+        self._dll = _DLL_CACHE.get(key)
+        if self._dll is None:
+            # Loading by absolute path also resolves the Kinesis DLLs it depends on from
+            # the same folder, without changing the working directory of the process
+            self._dll = ctypes.CDLL(os.path.join(dll_path, "Thorlabs.MotionControl.KCube.BrushlessMotor.dll"))
+            self._configure_dll(self._dll)
+            _DLL_CACHE[key] = self._dll
+
+        # DLL calls used in polling and wait loops, bound to this device's serial number
+        self._wait = functools.partial(self._dll.BMC_WaitForMessage, self.sn_ptr)
+        self._req_pos = functools.partial(self._dll.BMC_RequestPosition, self.sn_ptr)
+        self._get_pos = functools.partial(self._dll.BMC_GetPosition, self.sn_ptr)
+        self._queue_size = functools.partial(self._dll.BMC_MessageQueueSize, self.sn_ptr)
 
         self.message_type = ctypes.c_ushort()
         self.message_id = ctypes.c_ushort()
@@ -35,42 +47,52 @@ class TLKBD101:
         self.is_homed = False
         self.is_moving = False
 
+    @staticmethod
+    def _configure_dll(dll):
+        """
+        Declare the argument and return types of the DLL functions. Called once per loaded DLL.
 
-        self._dll.TLI_BuildDeviceList.restype = ctypes.c_short
-        self._dll.TLI_GetDeviceListSize.restype = ctypes.c_short
-        self._dll.TLI_GetDeviceListByTypeExt.argtypes = [ctypes.c_char_p, DWORD, ctypes.c_int]
-        self._dll.TLI_GetDeviceListByTypeExt.restype = ctypes.c_short
-        self._dll.BMC_Open.argtypes = [ctypes.c_char_p]
-        self._dll.BMC_Open.restype = ctypes.c_short
-        self._dll.BMC_LoadSettings.argtypes = [ctypes.c_char_p]
-        self._dll.BMC_LoadSettings.restype = ctypes.c_bool
-        self._dll.BMC_StartPolling.argtypes = [ctypes.c_char_p, ctypes.c_int]
-        self._dll.BMC_StartPolling.restype = ctypes.c_bool
-        self._dll.BMC_EnableChannel.argtypes = [ctypes.c_char_p]
-        self._dll.BMC_EnableChannel.restype = ctypes.c_short
-        self._dll.BMC_ClearMessageQueue.argtypes = [ctypes.c_char_p]
-        self._dll.BMC_ClearMessageQueue.restype = ctypes.c_short
-        self._dll.BMC_Home.argtypes = [ctypes.c_char_p]
-        self._dll.BMC_Home.restype = ctypes.c_short
-        self._dll.BMC_WaitForMessage.argtypes = [ctypes.c_char_p, ctypes.POINTER(WORD), ctypes.POINTER(WORD), ctypes.POINTER(DWORD)]
-        self._dll.BMC_WaitForMessage.restype = ctypes.c_bool
-        self._dll.BMC_MoveToPosition.argtypes = [ctypes.c_char_p, ctypes.c_int]
-        self._dll.BMC_MoveToPosition.restype = ctypes.c_short
-        self._dll.BMC_GetDeviceUnitFromRealValue.argtypes = [ctypes.c_char_p, ctypes.c_double, ctypes.POINTER(ctypes.c_int), ctypes.c_int]
-        self._dll.BMC_GetDeviceUnitFromRealValue.restype = ctypes.c_short
-        self._dll.BMC_SetVelParams.argtypes = [ctypes.c_char_p, ctypes.c_int, ctypes.c_int]
-        self._dll.BMC_SetVelParams.restype = ctypes.c_short
-        self._dll.BMC_RequestPosition.argtypes = [ctypes.c_char_p]
-        self._dll.BMC_RequestPosition.restype = ctypes.c_short
-        self._dll.BMC_GetPosition.restype = ctypes.c_int
-        self._dll.BMC_SetMotorParamsExt.argtypes = [ctypes.c_char_p,ctypes.c_double]
-        self._dll.BMC_SetMotorParamsExt.restype = ctypes.c_short
-        self._dll.BMC_ClearMessageQueue.argtypes = [ctypes.c_char_p]
-        self._dll.BMC_ClearMessageQueue.restype = ctypes.c_short
-        self._dll.BMC_StopPolling.argtypes=[ctypes.c_char_p]
-        self._dll.BMC_Close.argtypes=[ctypes.c_char_p]
-
-        
+        :param dll: The loaded Kinesis DLL.
+        :type dll: ctypes.CDLL
+        """
+        # All functions below have argtypes declared, so plain Python ints and floats are
+        # converted in C. Pass them directly instead of building ctypes objects per call.
+        dll.TLI_BuildDeviceList.restype = ctypes.c_short
+        dll.TLI_GetDeviceListSize.restype = ctypes.c_short
+        dll.TLI_GetDeviceListByTypeExt.argtypes = [ctypes.c_char_p, DWORD, ctypes.c_int]
+        dll.TLI_GetDeviceListByTypeExt.restype = ctypes.c_short
+        dll.BMC_Open.argtypes = [ctypes.c_char_p]
+        dll.BMC_Open.restype = ctypes.c_short
+        dll.BMC_LoadSettings.argtypes = [ctypes.c_char_p]
+        dll.BMC_LoadSettings.restype = ctypes.c_bool
+        dll.BMC_StartPolling.argtypes = [ctypes.c_char_p, ctypes.c_int]
+        dll.BMC_StartPolling.restype = ctypes.c_bool
+        dll.BMC_EnableChannel.argtypes = [ctypes.c_char_p]
+        dll.BMC_EnableChannel.restype = ctypes.c_short
+        dll.BMC_ClearMessageQueue.argtypes = [ctypes.c_char_p]
+        dll.BMC_ClearMessageQueue.restype = ctypes.c_short
+        dll.BMC_Home.argtypes = [ctypes.c_char_p]
+        dll.BMC_Home.restype = ctypes.c_short
+        dll.BMC_WaitForMessage.argtypes = [ctypes.c_char_p, ctypes.POINTER(WORD), ctypes.POINTER(WORD), ctypes.POINTER(DWORD)]
+        dll.BMC_WaitForMessage.restype = ctypes.c_bool
+        dll.BMC_MoveToPosition.argtypes = [ctypes.c_char_p, ctypes.c_int]
+        dll.BMC_MoveToPosition.restype = ctypes.c_short
+        dll.BMC_GetDeviceUnitFromRealValue.argtypes = [ctypes.c_char_p, ctypes.c_double, ctypes.POINTER(ctypes.c_int), ctypes.c_int]
+        dll.BMC_GetDeviceUnitFromRealValue.restype = ctypes.c_short
+        dll.BMC_SetVelParams.argtypes = [ctypes.c_char_p, ctypes.c_int, ctypes.c_int]
+        dll.BMC_SetVelParams.restype = ctypes.c_short
+        dll.BMC_RequestPosition.argtypes = [ctypes.c_char_p]
+        dll.BMC_RequestPosition.restype = ctypes.c_short
+        dll.BMC_GetPosition.argtypes = [ctypes.c_char_p]
+        dll.BMC_GetPosition.restype = ctypes.c_int
+        dll.BMC_MessageQueueSize.argtypes = [ctypes.c_char_p]
+        dll.BMC_MessageQueueSize.restype = ctypes.c_int
+        dll.BMC_SetMotorParamsExt.argtypes = [ctypes.c_char_p,ctypes.c_double]
+        dll.BMC_SetMotorParamsExt.restype = ctypes.c_short
+        dll.BMC_ClearMessageQueue.argtypes = [ctypes.c_char_p]
+        dll.BMC_ClearMessageQueue.restype = ctypes.c_short
+        dll.BMC_StopPolling.argtypes=[ctypes.c_char_p]
+        dll.BMC_Close.argtypes=[ctypes.c_char_p]
 
     def build_device_list(self):
         """
@@ -91,7 +113,7 @@ class TLKBD101:
             if self._dll.TLI_GetDeviceListByTypeExt(s_buf,tl_c_buf_size, dev_id) != 0:
                 print("No devices of type {} found".format(dev_id))
                 return
-            self.serial_number_list = s_buf.value.decode('ascii').split(',')[0:-1]
+            self.serial_number_list = ctypes.string_at(s_buf).decode('ascii').split(',')[0:-1]
        
             if self.serial_number not in self.serial_number_list:
                 print(f"No device with serial number {self.serial_number} found...")
@@ -105,7 +127,7 @@ class TLKBD101:
         if self._dll.BMC_Open(self.sn_ptr) == 0:
             print("Connected to {}...".format(self.serial_number))
             if self._dll.BMC_LoadSettings(self.sn_ptr):
-                self._dll.BMC_StartPolling(self.sn_ptr, ctypes.c_int(POLLTIME))
+                self._dll.BMC_StartPolling(self.sn_ptr, POLLTIME)
                 self._dll.BMC_EnableChannel(self.sn_ptr)
                 time.sleep(3)
                 self._dll.BMC_ClearMessageQueue(self.sn_ptr)
@@ -124,8 +146,7 @@ class TLKBD101:
             self._dll.BMC_Home(self.sn_ptr)
         except Exception as e:
             print("Failed to Home: {}".format(e))
-        while self.message_id.value != 0 or self.message_type.value != 2:
-            self._dll.BMC_WaitForMessage(self.sn_ptr, ctypes.byref(self.message_type), ctypes.byref(self.message_id), ctypes.byref(self.message_data))
+        self._wait_for_message(2, 0)
         print("Homed...")
         self.is_homed = True
         return self.is_homed
@@ -140,15 +161,32 @@ class TLKBD101:
         if self.is_homed:
             print(f"Moving to {position}...")
             try:
-                retval = self._dll.BMC_MoveToPosition(self.sn_ptr, ctypes.c_int(position))
+                retval = self._dll.BMC_MoveToPosition(self.sn_ptr, position)
                 if retval != 0:
                     print(f"Error Moving to Position. Error Code: {retval}...")
+                    return
+                self._wait_for_message(2, 1)
             except Exception as e:
                 print(f"Error when Moving to {position}: {e}")
-                while self.message_id.value != 1 or self.message_type.value != 2:
-                    self._dll.BMC_WaitForMessage(self.sn_ptr, ctypes.byref(self.message_type), ctypes.byref(self.message_id), ctypes.byref(self.message_data))
             print("Moved...")
 
+    def _wait_for_message(self, message_type, message_id):
+        """
+        Block until the device posts the given message. Each BMC_WaitForMessage call blocks
+        in the DLL until the next message arrives, so only one call is made per message.
+
+        :param message_type: The message type to wait for (2: GenericMotor).
+        :type message_type: int
+        :param message_id: The message id to wait for (0: Homed, 1: Moved).
+        :type message_id: int
+        """
+        wait = self._wait
+        received_type, received_id, received_data = self.message_type, self.message_id, self.message_data
+        while True:
+            wait(received_type, received_id, received_data)
+            if received_type.value == message_type and received_id.value == message_id:
+                return
+
     def get_device_unit_from_real_value(self, real_value, unit_type):
         """
         Convert a real value to device units.
@@ -161,7 +199,7 @@ class TLKBD101:
         :rtype: int
         """
         device_unit = ctypes.c_int()
-        retval = self._dll.BMC_GetDeviceUnitFromRealValue(self.sn_ptr, ctypes.c_double(real_value), ctypes.byref(device_unit), ctypes.c_int(unit_type))
+        retval = self._dll.BMC_GetDeviceUnitFromRealValue(self.sn_ptr, real_value, ctypes.byref(device_unit), unit_type)
         if retval == 0:
             return device_unit.value
         else:
@@ -192,7 +230,7 @@ class TLKBD101:
         try:
             acceleration_du = self.get_device_unit_from_real_value(acceleration, 2)
             max_velocity_du = self.get_device_unit_from_real_value(max_velocity, 1)
-            retval = self._dll.BMC_SetVelParams(self.sn_ptr, ctypes.c_int(acceleration_du), ctypes.c_int(max_velocity_du))
+            retval = self._dll.BMC_SetVelParams(self.sn_ptr, acceleration_du, max_velocity_du)
             if retval != 0:
                 print(f"Error setting Velocity Parameters, Error Code: {retval}...")
         except Exception as e:
@@ -208,7 +246,7 @@ class TLKBD101:
         :type max_velocity: int
         """
         try:
-            retval = self._dll.BMC_SetVelParams(self.sn_ptr, ctypes.c_int(acceleration), ctypes.c_int(max_velocity))
+            retval = self._dll.BMC_SetVelParams(self.sn_ptr, acceleration, max_velocity)
             if retval != 0:
                 print(f"Error setting Velocity Parameters, Error Code: {retval}...")
         except Exception as e:
@@ -222,16 +260,31 @@ class TLKBD101:
         :rtype: int
         """
         try:
-            retval = self._dll.BMC_RequestPosition(self.sn_ptr)
+            # Drop queued status updates so the wait below only accepts one sent after the request
+            self._dll.BMC_ClearMessageQueue(self.sn_ptr)
+            retval = self._req_pos()
             if retval == 0:
-                time.sleep(0.1)
-                current_position = self._dll.BMC_GetPosition(self.sn_ptr)
+                self._wait_for_status_update()
+                current_position = self._get_pos()
                 return current_position
             else:
                 print(f"Error Code: {retval}")
         except Exception as e:
             print(f"Error getting position {e}")
 
+    def _wait_for_status_update(self):
+        """
+        Wait until the device reports a status update, or for at most one polling period.
+        Messages are only read when the queue is not empty, so the wait never blocks longer.
+        """
+        deadline = time.monotonic() + POLLTIME / 1000
+        while time.monotonic() < deadline:
+            while self._queue_size() > 0:
+                self._wait(self.message_type, self.message_id, self.message_data)
+                if self.message_type.value == 0:
+                    return
+            time.sleep(0.001)
+
     def set_motor_params(self, counts_per_rev):
         """
         Set the motor parameters (counts per revolution).
@@ -240,7 +293,7 @@ class TLKBD101:
         :type counts_per_rev: float
         """
         try:
-            retval = self._dll.BMC_SetMotorParamsExt(self.sn_ptr, ctypes.c_double(counts_per_rev))
+            retval = self._dll.BMC_SetMotorParamsExt(self.sn_ptr, counts_per_rev)
             if retval == 0:
                 print("Motor Parameters Set...")
             else:
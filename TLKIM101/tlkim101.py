@@ -1,7 +1,10 @@
 import os
 import time
-import sys
 import ctypes
+import functools
+
+DWORD = ctypes.c_ulong
+WORD = ctypes.c_ushort
 
 POLLTIME = 100 # in milliseconds
 NUM_CHANNELS = 4
@@ -9,6 +12,9 @@ NUM_CHANNELS = 4
 FORWARD = 0x01
 REVERSE = 0x02
 
+# Loaded DLLs keyed by (dll_path, dll_name), shared by all instances
+_DLL_CACHE = {}
+
 class TLKIM101:
     """
     A class to control the Thorlabs KIM101 and KIM001 Inertial Motor Controller.
@@ -18,11 +24,17 @@ class TLKIM101:
         self.serial_number = str(serial_number)
         self.sn_ptr = ctypes.c_char_p(self.serial_number.encode('ascii'))
 
-        if sys.version_info < (3, 8):
-            os.chdir(dll_path)
-        else:
-            os.add_dll_directory(dll_path)
-        self._dll = ctypes.cdll.LoadLibrary("Thorlabs.MotionControl.KCube.IntertialMotor.dll")
+        key = (dll_path, "Thorlabs.MotionControl.KCube.IntertialMotor.dll")
+        self._dll = _DLL_CACHE.get(key)
+        if self._dll is None:
+            # Loading by absolute path also resolves the Kinesis DLLs it depends on from
+            # the same folder, without changing the working directory of the process
+            self._dll = ctypes.CDLL(os.path.join(dll_path, "Thorlabs.MotionControl.KCube.IntertialMotor.dll"))
+            self._configure_dll(self._dll)
+            _DLL_CACHE[key] = self._dll
+
+        # Message wait used by wait_for_move, bound to this device's serial number
+        self._wait = functools.partial(self._dll.KIM_WaitForMessage, self.sn_ptr)
 
         self.message_type = ctypes.c_ushort()
         self.message_id = ctypes.c_ushort()
@@ -31,6 +43,44 @@ class TLKIM101:
         self.is_homed=False
         self.is_moving=False
 
+    @staticmethod
+    def _configure_dll(dll):
+        """
+        Declare the argument and return types of the DLL functions. Called once per loaded DLL.
+
+        :param dll: The loaded Kinesis DLL.
+        :type dll: ctypes.CDLL
+        """
+        # All functions below have argtypes declared, so plain Python ints are converted in C
+        dll.TLI_BuildDeviceList.restype = ctypes.c_short
+        dll.TLI_GetDeviceListSize.restype = ctypes.c_short
+        dll.KIM_Open.argtypes = [ctypes.c_char_p]
+        dll.KIM_Open.restype = ctypes.c_short
+        dll.KIM_LoadSettings.argtypes = [ctypes.c_char_p]
+        dll.KIM_LoadSettings.restype = ctypes.c_bool
+        dll.KIM_StartPolling.argtypes = [ctypes.c_char_p, ctypes.c_int]
+        dll.KIM_StartPolling.restype = ctypes.c_bool
+        dll.KIM_EnableChannel.argtypes = [ctypes.c_char_p, ctypes.c_uint16]
+        dll.KIM_EnableChannel.restype = ctypes.c_short
+        dll.KIM_Home.argtypes = [ctypes.c_char_p, ctypes.c_uint16]
+        dll.KIM_Home.restype = ctypes.c_short
+        dll.KIM_MoveAbsolute.argtypes = [ctypes.c_char_p, ctypes.c_uint16, ctypes.c_int32]
+        dll.KIM_MoveAbsolute.restype = ctypes.c_short
+        dll.KIM_MoveRelative.argtypes = [ctypes.c_char_p, ctypes.c_uint16, ctypes.c_int32]
+        dll.KIM_MoveRelative.restype = ctypes.c_short
+        dll.KIM_MoveJog.argtypes = [ctypes.c_char_p, ctypes.c_uint16, ctypes.c_ubyte]
+        dll.KIM_MoveJog.restype = ctypes.c_short
+        dll.KIM_MoveStop.argtypes = [ctypes.c_char_p, ctypes.c_uint16]
+        dll.KIM_MoveStop.restype = ctypes.c_short
+        dll.KIM_WaitForMessage.argtypes = [ctypes.c_char_p, ctypes.POINTER(WORD), ctypes.POINTER(WORD), ctypes.POINTER(DWORD)]
+        dll.KIM_WaitForMessage.restype = ctypes.c_bool
+        dll.KIM_ClearMessageQueue.argtypes = [ctypes.c_char_p]
+        dll.KIM_ClearMessageQueue.restype = None
+        dll.KIM_StopPolling.argtypes = [ctypes.c_char_p]
+        dll.KIM_StopPolling.restype = None
+        dll.KIM_Close.argtypes = [ctypes.c_char_p]
+        dll.KIM_Close.restype = None
+
     def build_device_list(self):
         """
         Builds a device list and returns the number of devices found.
@@ -55,8 +105,8 @@ class TLKIM101:
         if self._dll.KIM_Open(self.sn_ptr) == 0:
             print(f"Connected to {self.serial_number}")
             if self._dll.KIM_LoadSettings(self.sn_ptr):
-                self._dll.KIM_StartPolling(self.sn_ptr, ctypes.c_int(POLLTIME))
-                self._dll.KIM_EnableChannel(self.sn_ptr, ctypes.c_int16(channel))
+                self._dll.KIM_StartPolling(self.sn_ptr, POLLTIME)
+                self._dll.KIM_EnableChannel(self.sn_ptr, channel)
                 time.sleep(3)
                 self._dll.KIM_ClearMessageQueue(self.sn_ptr)
             else:
@@ -73,7 +123,7 @@ class TLKIM101:
         """
         print(f"Homing channel {channel}...")
         try:
-            self._dll.KIM_Home(self.sn_ptr, ctypes.c_int16(channel))
+            self._dll.KIM_Home(self.sn_ptr, channel)
         except Exception as e:
             print(f"Failed to home: {e}")
         self.wait_for_move(channel)  # Removed the first 'self' argument
@@ -92,7 +142,7 @@ class TLKIM101:
         """
         print(f"Moving channel {channel} to {position}...")
         try:
-            self._dll.KIM_MoveAbsolute(self.sn_ptr, ctypes.c_uint16(channel), ctypes.c_int32(position))
+            self._dll.KIM_MoveAbsolute(self.sn_ptr, channel, position)
             self.wait_for_move(channel)  # Removed 'self' as the first argument
         except Exception as e:
             print(f"Failed to move: {e}")
@@ -108,7 +158,7 @@ class TLKIM101:
         """
         print(f"Moving channel {channel} by {step_size}...")
         try:
-            self._dll.KIM_MoveRelative(self.sn_ptr, ctypes.c_uint16(channel), ctypes.c_int32(step_size))
+            self._dll.KIM_MoveRelative(self.sn_ptr, channel, step_size)
             self.wait_for_move(channel)  # Removed 'self' as the first argument
         except Exception as e:
             print(f"Failed to move: {e}")
@@ -125,7 +175,7 @@ class TLKIM101:
         # direction is FORWARD or REVERSE
         print(f"Jogging channel {channel} in  {direction}...")
         try:
-            self._dll.KIM_MoveJog(self.sn_ptr, ctypes.c_uint16(channel), ctypes.c_ubyte(direction))
+            self._dll.KIM_MoveJog(self.sn_ptr, channel, direction)
         except Exception as e:
             print(f"Failed to jog: {e}")
 
@@ -138,7 +188,7 @@ class TLKIM101:
         """
         print(f"Stopping channel {channel}...")
         try:
-            self._dll.KIM_MoveStop(self.sn_ptr, ctypes.c_uint16(channel))
+            self._dll.KIM_MoveStop(self.sn_ptr, channel)
         except Exception as e:
             print(f"Failed to stop: {e}")
 
@@ -149,8 +199,14 @@ class TLKIM101:
         :param channel: The channel number to wait for.
         :type channel: int
         """
-        while self.message_id.value != 0 or self.message_type.value != 2:
-            self._dll.KIM_WaitForMessage(self.sn_ptr, ctypes.byref(self.message_type), ctypes.byref(self.message_id), ctypes.byref(self.message_data))
+        # Each KIM_WaitForMessage call blocks in the DLL until the next message arrives.
+        # Wait for a GenericMotor (2) Homed (0), Moved (1) or Stopped (2) message.
+        wait = self._wait
+        received_type, received_id, received_data = self.message_type, self.message_id, self.message_data
+        while True:
+            wait(received_type, received_id, received_data)
+            if received_type.value == 2 and received_id.value in (0, 1, 2):
+                return
 
     def disconnect(self):
         """
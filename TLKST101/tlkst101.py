@@ -1,24 +1,98 @@
 import os
 import time
-import sys
 import ctypes
 
+try:
+    import cffi
+except ImportError:
+    cffi = None
+
+DWORD = ctypes.c_ulong
+WORD = ctypes.c_ushort
+
 POLLTIME = 100 # in milliseconds
+# Polling intervals in milliseconds, fast while a move is running and slow otherwise
+POLLTIME_ACTIVE = 50
+POLLTIME_IDLE = 500
+# Longest wait in milliseconds for the reply to a position request
+POSITION_TIMEOUT = 100
+# Interval in seconds between checks of an empty message queue
+QUEUE_CHECK_INTERVAL = 0.002
+# Number of unit conversions kept by get_device_unit_from_real_value
+UNIT_CACHE_SIZE = 4096
 
 class TLKST101:
     """
     A class to control the Thorlabs KCube Stepper Motor Controller.
     Needs Thorlabs.MotionControl.KCube.StepperMotor.dll.
     """
-    def __init__(self, serial_number, dll_path):
+    def __init__(self, serial_number, dll_path, poll_ms_active=POLLTIME_ACTIVE, poll_ms_idle=POLLTIME_IDLE, poll_time=None):
+        """
+        :param serial_number: The serial number of the KST101 device.
+        :type serial_number: str
+        :param dll_path: The path to the Thorlabs Kinesis DLL files.
+        :type dll_path: str
+        :param poll_ms_active: Device polling interval in milliseconds while moving. Shorter intervals report the end of moves sooner.
+        :type poll_ms_active: int
+        :param poll_ms_idle: Device polling interval in milliseconds while not moving.
+        :type poll_ms_idle: int
+        :param poll_time: Single polling interval in milliseconds used both while moving and while not moving. Overrides poll_ms_active and poll_ms_idle if given.
+        :type poll_time: int
+        """
+        if poll_time is not None:
+            poll_ms_active = poll_ms_idle = poll_time
         self.serial_number = str(serial_number)
-        self.sn_ptr = ctypes.c_char_p(self.serial_number.encode('ascii'))
+        self.poll_ms_active = poll_ms_active
+        self.poll_ms_idle = poll_ms_idle
+        # Interval the device is currently polled at
+        self.poll_time = poll_ms_idle
+        # Encoded once and passed to every SCC_* call
+        self._sn_bytes = self.serial_number.encode('ascii')
+        self.sn_ptr = ctypes.c_char_p(self._sn_bytes)
 
-        if sys.version_info < (3, 8):
-            os.chdir(dll_path)
-        else:
-            os.add_dll_directory(dll_path)
-        self._dll = ctypes.cdll.LoadLibrary("Thorlabs.MotionControl.KCube.StepperMotor.dll")
+        # Loading by absolute path also resolves the Kinesis DLLs it depends on from
+        # the same folder, without changing the working directory of the process
+        dll_full_path = os.path.join(dll_path, "Thorlabs.MotionControl.KCube.StepperMotor.dll")
+        self._dll = ctypes.CDLL(dll_full_path)
+
+        # With argtypes declared, plain Python ints and floats are converted in C
+        for name, argtypes, restype in [
+            ("TLI_BuildDeviceList", [], ctypes.c_short),
+            ("TLI_GetDeviceListSize", [], ctypes.c_short),
+            ("SCC_Open", [ctypes.c_char_p], ctypes.c_short),
+            ("SCC_LoadSettings", [ctypes.c_char_p], ctypes.c_bool),
+            ("SCC_StartPolling", [ctypes.c_char_p, ctypes.c_int], ctypes.c_bool),
+            ("SCC_EnableChannel", [ctypes.c_char_p], ctypes.c_short),
+            ("SCC_ClearMessageQueue", [ctypes.c_char_p], None),
+            ("SCC_Home", [ctypes.c_char_p], ctypes.c_short),
+            ("SCC_MoveToPosition", [ctypes.c_char_p, ctypes.c_int], ctypes.c_short),
+            ("SCC_WaitForMessage", [ctypes.c_char_p, ctypes.POINTER(WORD), ctypes.POINTER(WORD), ctypes.POINTER(DWORD)], ctypes.c_bool),
+            ("SCC_MessageQueueSize", [ctypes.c_char_p], ctypes.c_int),
+            ("SCC_GetDeviceUnitFromRealValue", [ctypes.c_char_p, ctypes.c_double, ctypes.POINTER(ctypes.c_int), ctypes.c_int], ctypes.c_short),
+            ("SCC_SetVelParams", [ctypes.c_char_p, ctypes.c_int, ctypes.c_int], ctypes.c_short),
+            ("SCC_RequestPosition", [ctypes.c_char_p], ctypes.c_short),
+            ("SCC_GetPosition", [ctypes.c_char_p], ctypes.c_int),
+            ("SCC_StopPolling", [ctypes.c_char_p], None),
+            ("SCC_Close", [ctypes.c_char_p], None),
+        ]:
+            func = getattr(self._dll, name)
+            func.argtypes = argtypes
+            func.restype = restype
+
+        # Position reads are called in tight scan loops, so use cffi's cheaper call path
+        # for them when it is installed
+        self._request_position = self._dll.SCC_RequestPosition
+        self._get_position = self._dll.SCC_GetPosition
+        if cffi is not None:
+            ffi = cffi.FFI()
+            ffi.cdef("""
+                short SCC_RequestPosition(char const *serialNo);
+                int SCC_GetPosition(char const *serialNo);
+            """)
+            lib = ffi.dlopen(dll_full_path)
+            self._ffi_lib = lib  # keeps the library loaded
+            self._request_position = lib.SCC_RequestPosition
+            self._get_position = lib.SCC_GetPosition
 
         self.message_type = ctypes.c_ushort()
         self.message_id = ctypes.c_ushort()
@@ -27,6 +101,10 @@ class TLKST101:
         self.is_homed = False
         self.is_moving = False
 
+        # Device units already looked up, keyed by (unit_type, real_value rounded to 6 decimals).
+        # Holds at most UNIT_CACHE_SIZE entries, the least recently used one is dropped first.
+        self._unit_cache = {}
+
     def build_device_list(self):
         """
         Builds the device list and returns the number of devices found.
@@ -44,13 +122,17 @@ class TLKST101:
         """
         Connects to the device with the specified serial number and loads its settings.
         """
+        # The conversion depends on the stage settings loaded below
+        self._unit_cache.clear()
         if self._dll.SCC_Open(self.sn_ptr) == 0:
             print(f"Connected to {self.serial_number}")
             if self._dll.SCC_LoadSettings(self.sn_ptr):
-                self._dll.SCC_StartPolling(self.sn_ptr, ctypes.c_int(POLLTIME))
+                self.poll_time = self.poll_ms_idle
+                self._dll.SCC_StartPolling(self.sn_ptr, self.poll_time)
                 self._dll.SCC_EnableChannel(self.sn_ptr)
-                time.sleep(3)
-                self._dll.SCC_ClearMessageQueue(self.sn_ptr)
+                # Wait for the first settings update instead of a fixed delay. Messages
+                # still queued after it are skipped by the later waits.
+                self._drain_until(0, 1, timeout_ms=3000)
             else:
                 print("Error loading settings")
 
@@ -63,6 +145,8 @@ class TLKST101:
         """
         print(f"Homing {self.serial_number}...")
 
+        self._set_poll_time(self.poll_ms_active)
+        self.is_moving = True
         try:
             self._dll.SCC_Home(self.sn_ptr)
         except Exception as e:
@@ -80,8 +164,10 @@ class TLKST101:
         :type position: int
         """
         print(f"Moving to position {position}...")
+        self._set_poll_time(self.poll_ms_active)
+        self.is_moving = True
         try:
-            self._dll.SCC_MoveToPosition(self.sn_ptr, ctypes.c_int(position))
+            self._dll.SCC_MoveToPosition(self.sn_ptr, position)
         except Exception as e:
             print(f"Failed to move: {e}")
         self.wait_for_move(1)
@@ -89,13 +175,63 @@ class TLKST101:
     
     def wait_for_move(self, num):  # Added 'self' as the first argument
         """
-        Waits for the device to complete the move operation.
+        Waits for the device to complete the move operation, then returns to idle polling.
         
         :param num: Expected message ID value.
         :type num: int
         """
-        while self.message_id.value != num or self.message_type.value != 2:
-            self._dll.SCC_WaitForMessage(self.sn_ptr, ctypes.byref(self.message_type), ctypes.byref(self.message_id), ctypes.byref(self.message_data))
+        self._drain_until(2, num)
+        self.is_moving = False
+        self._set_poll_time(self.poll_ms_idle)
+
+    def _set_poll_time(self, poll_time):
+        """
+        Restarts device polling at a new interval if it differs from the current one.
+        
+        :param poll_time: Polling interval in milliseconds.
+        :type poll_time: int
+        """
+        if poll_time != self.poll_time:
+            self._dll.SCC_StopPolling(self.sn_ptr)
+            self._dll.SCC_StartPolling(self.sn_ptr, poll_time)
+            self.poll_time = poll_time
+
+    def _drain_until(self, msg_type, msg_id, timeout_ms=None):
+        """
+        Reads device messages until the given message arrives.
+        
+        :param msg_type: Expected message type value.
+        :type msg_type: int
+        :param msg_id: Expected message ID value.
+        :type msg_id: int
+        :param timeout_ms: Maximum time to wait in milliseconds. Waits indefinitely if None.
+        :type timeout_ms: int
+        :return: True if the message arrived, False on timeout.
+        :rtype: bool
+        """
+        if timeout_ms is None:
+            deadline = None
+        else:
+            deadline = time.monotonic() + timeout_ms / 1000
+        wait_for_message = self._dll.SCC_WaitForMessage
+        queue_size = self._dll.SCC_MessageQueueSize
+        sn_ptr = self.sn_ptr
+        received_type, received_id, received_data = self.message_type, self.message_id, self.message_data
+        while True:
+            # SCC_WaitForMessage blocks inside the DLL until a message arrives, where neither
+            # a timeout nor Ctrl-C can interrupt it, so only call it once a message is queued
+            if queue_size(sn_ptr) <= 0:
+                interval = QUEUE_CHECK_INTERVAL
+                if deadline is not None:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        return False
+                    interval = min(interval, remaining)
+                time.sleep(interval)
+                continue
+            wait_for_message(sn_ptr, received_type, received_id, received_data)
+            if received_type.value == msg_type and received_id.value == msg_id:
+                return True
 
     def get_device_unit_from_real_value(self, real_value, unit_type):
         """
@@ -109,9 +245,19 @@ class TLKST101:
         :rtype: int
         """
         #unit_type: Distance = 0, Velocity = 1, Acceleration = 2
+        key = (unit_type, round(real_value, 6))
+        cache = self._unit_cache
+        cached = cache.pop(key, None)
+        if cached is not None:
+            # Reinserting moves the entry to the end, so the first key is always the least recently used
+            cache[key] = cached
+            return cached
         device_unit = ctypes.c_int()
-        retval = self._dll.SCC_GetDeviceUnitFromRealValue(self.sn_ptr, ctypes.c_double(real_value), ctypes.byref(device_unit), ctypes.c_int(unit_type))
+        retval = self._dll.SCC_GetDeviceUnitFromRealValue(self.sn_ptr, real_value, ctypes.byref(device_unit), unit_type)
         if retval == 0:
+            if len(cache) >= UNIT_CACHE_SIZE:
+                del cache[next(iter(cache))]
+            cache[key] = device_unit.value
             return device_unit.value
         else:
             print(f"Failed to convert Real to Device unit. Error Code {retval}...")
@@ -129,6 +275,24 @@ class TLKST101:
         else:
             print("Device not homed...")
 
+    def move_to_position_real_units_batch(self, positions):
+        """
+        Moves the device through a sequence of positions in real-world units, waiting for each move to complete.
+        
+        All positions are converted to device units before the first move.
+        
+        :param positions: Target positions in real-world units.
+        :type positions: Iterable[float]
+        """
+        if not self.is_homed:
+            print("Device not homed...")
+            return
+        device_units = [self.get_device_unit_from_real_value(position, 0) for position in positions]
+        if None in device_units:
+            return
+        for device_unit in device_units:
+            self.move_to_position_device_units(device_unit)
+
     def set_velocity_parameters_real_units(self, acceleration, max_velocity):
         """
         Sets the device's velocity parameters using real-world units.
@@ -141,7 +305,7 @@ class TLKST101:
         try:
             acceleration_du = self.get_device_unit_from_real_value(acceleration, 2)
             max_velocity_du = self.get_device_unit_from_real_value(max_velocity, 1)
-            retval = self._dll.SCC_SetVelParams(self.sn_ptr, ctypes.c_int(acceleration_du), ctypes.c_int(max_velocity_du))
+            retval = self._dll.SCC_SetVelParams(self.sn_ptr, acceleration_du, max_velocity_du)
             if retval != 0:
                 print(f"Error setting Velocity Parameters, Error Code: {retval}...")
         except Exception as e:
@@ -157,7 +321,7 @@ class TLKST101:
         :type max_velocity: int
         """
         try:
-            retval = self._dll.SCC_SetVelParams(self.sn_ptr, ctypes.c_int(acceleration), ctypes.c_int(max_velocity))
+            retval = self._dll.SCC_SetVelParams(self.sn_ptr, acceleration, max_velocity)
             if retval != 0:
                 print(f"Error setting Velocity Parameters, Error Code: {retval}...")
         except Exception as e:
@@ -171,10 +335,14 @@ class TLKST101:
         :rtype: int
         """
         try:
-            retval = self._dll.SCC_RequestPosition(self.sn_ptr)
+            # Drop queued status updates so the wait below only accepts one sent after the request
+            self._dll.SCC_ClearMessageQueue(self.sn_ptr)
+            retval = self._request_position(self._sn_bytes)
             if retval == 0:
-                time.sleep(0.1)
-                current_position = self._dll.SCC_GetPosition(self.sn_ptr)
+                # Wait for the status update with the new position. The device answers the request
+                # directly, so the wait does not depend on the polling interval
+                self._drain_until(0, 1, timeout_ms=POSITION_TIMEOUT)
+                current_position = self._get_position(self._sn_bytes)
                 return current_position
             else:
                 print(f"Error Code: {retval}")
@@ -188,4 +356,5 @@ class TLKST101:
         self._dll.SCC_ClearMessageQueue(self.sn_ptr)
         self._dll.SCC_StopPolling(self.sn_ptr)
         self._dll.SCC_Close(self.sn_ptr)
+        self._unit_cache.clear()
 
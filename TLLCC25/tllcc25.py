@@ -1,5 +1,7 @@
+import array
 import ctypes
-from typing import List, Any, Tuple
+import time
+from typing import List, Any, Sequence, Tuple
 
 
 class DLLWrapper:
@@ -32,6 +34,13 @@ class TLLCC25(DLLWrapper):
             ("Close", [ctypes.c_int], ctypes.c_int),
         ])
 
+        # Buffer reused by the device enumeration calls
+        self._enum_buf = ctypes.create_string_buffer(1024)
+
+        # Serial number of the last opened device, encoded for the DLL
+        self._sn = None
+        self._sn_bytes = None
+
     def list(self) -> List[Tuple[str, str]]:
         """
         List all ports on this computer.
@@ -39,15 +48,14 @@ class TLLCC25(DLLWrapper):
         :return: The LCC25 device list, each device item is a tuple of (serialNumber, COM)
         :rtype: List[Tuple[str, str]]
         """
-        serial_no = ctypes.create_string_buffer(1024)
+        serial_no = self._enum_buf
+        serial_no[0] = b'\x00'
         result = self._dll.List(serial_no)
         self.__test_for_error(result)
-        try:
-            devices_str = serial_no.value.decode("utf-8", "ignore").rstrip('\x00').split(',')
-            devices = [(devices_str[i], devices_str[i + 1]) for i in range(0, len(devices_str), 2) if devices_str[i]]
-        except Exception as e:
-            return [result]
-        return devices
+        devices_str = serial_no.value.decode("utf-8", "ignore").split(',')
+        # Pair up consecutive (serialNumber, COM) entries, skipping empty fields
+        it = iter(filter(None, devices_str))
+        return list(zip(it, it))
 
 
     
@@ -60,7 +68,8 @@ class TLLCC25(DLLWrapper):
                 Returns a negative number if unsuccessful.
         :rtype: str
         """
-        serial_no = ctypes.create_string_buffer(1024)
+        serial_no = self._enum_buf
+        serial_no[0] = b'\x00'
         result = self._dll.GetPorts(serial_no)
         self.__test_for_error(result)
 
@@ -81,9 +90,10 @@ class TLLCC25(DLLWrapper):
                 Returns a negative number if unsuccessful.
         :rtype: int
         """
-        result = self._dll.Open(serial_no.encode('utf-8'), 
-                                ctypes.c_int(n_baud), 
-                                ctypes.c_int(timeout))
+        if serial_no != self._sn:
+            self._sn = serial_no
+            self._sn_bytes = serial_no.encode('utf-8')
+        result = self._dll.Open(self._sn_bytes, n_baud, timeout)
         self.__test_for_error(result)
 
         return result
@@ -102,7 +112,7 @@ class TLLCC25(DLLWrapper):
         :return: 0 if successful, 0xEA if the command is not defined, or 0xEB if there's a timeout.
         :rtype: int
         """
-        result = self._dll.SetOutputMode(ctypes.c_int(hdl), ctypes.c_int(mode))
+        result = self._dll.SetOutputMode(hdl, mode)
         self.__test_for_error(result)
 
         return result
@@ -121,7 +131,7 @@ class TLLCC25(DLLWrapper):
         :rtype: Tuple[int, int]
         """
         output_mode = ctypes.c_int()
-        result = self._dll.GetOutputMode(ctypes.c_int(hdl), ctypes.byref(output_mode))
+        result = self._dll.GetOutputMode(hdl, ctypes.byref(output_mode))
         self.__test_for_error(result)
 
         return output_mode.value
@@ -141,11 +151,38 @@ class TLLCC25(DLLWrapper):
         :return: 0 if successful, 0xEA if the command is not defined, or 0xEB if there's a timeout.
         :rtype: int
         """
-        result = self._dll.SetVoltage1(ctypes.c_int(hdl), ctypes.c_double(vol))
+        result = self._dll.SetVoltage1(hdl, vol)
         self.__test_for_error(result)
 
         return result
 
+    def set_voltage1_sweep(self, hdl: int, values: Sequence[float], dwell_s: float = 0) -> int:
+        """
+        Step the LCC25's voltage1 value through a sequence of voltages.
+
+        Make sure the port was opened successfully before calling this function.
+        Make sure this is the correct device by checking the ID string before calling this function.
+
+        :param hdl: Handle of the port.
+        :type hdl: int
+        :param values: LCC25 voltage1 values, each should be between 0 and 25.
+        :type values: Sequence[float]
+        :param dwell_s: Time in seconds to hold each voltage.
+        :type dwell_s: float
+        :return: 0 if all voltages were set successfully.
+        :rtype: int
+        """
+        set_voltage = self._dll.SetVoltage1
+        sleep = time.sleep
+        for vol in array.array('d', values):
+            result = set_voltage(hdl, vol)
+            if result < 0:
+                self.__test_for_error(result)
+            if dwell_s > 0:
+                sleep(dwell_s)
+
+        return 0
+
     def set_voltage2(self, hdl: int, vol: float) -> int:
         """
         Set the LCC25's voltage2 value.
@@ -160,7 +197,7 @@ class TLLCC25(DLLWrapper):
         :return: 0 if successful, 0xEA if the command is not defined, or 0xEB if there's a timeout.
         :rtype: int
         """
-        result = self._dll.SetVoltage2(ctypes.c_int(hdl), ctypes.c_double(vol))
+        result = self._dll.SetVoltage2(hdl, vol)
         self.__test_for_error(result)
 
         return result
@@ -174,7 +211,7 @@ class TLLCC25(DLLWrapper):
         :return: 0 if successful, negative number if unsuccessful.
         :rtype: int
         """
-        result = self._dll.Close(ctypes.c_int(hdl))
+        result = self._dll.Close(hdl)
         self.__test_for_error(result)
 
         return result
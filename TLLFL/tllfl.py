@@ -1,5 +1,13 @@
+import os
+import queue
+import select
 import serial
+import threading
 import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+# Silence in seconds that ends a reply of unknown length
+MULTILINE_QUIET_TIME = 0.05
 
 class TLLFL:
     """A class to communicate with the Thorlabs Fiber laser."""
@@ -7,25 +15,107 @@ class TLLFL:
     def __init__(self, port):
         """Initialize a new Laser object with the specified port."""
         self.ser = serial.Serial(port, baudrate=115200, bytesize=8, parity='N', stopbits=1, timeout=1)
+        # Replies end with a carriage return, an optional line feed is removed by strip()
+        self._term = b'\r'
+
+        # Commands queued by send_async, written by a single worker thread
+        self._queue = queue.Queue()
+        self._worker = None
+
+        # Single thread that runs send_command_async requests in order
+        self._executor = None
 
-    def send_command(self, command):
-        """Send a command to the laser and return the response."""
+    def send_command(self, command, nlines=1):
+        """
+        Send a command to the laser and return the response.
+
+        Returns as soon as nlines reply lines have arrived. With nlines=None, lines are read
+        until the laser has been silent for MULTILINE_QUIET_TIME seconds.
+        """
+        self.flush()
         try:
-            self.ser.write((command + '\r').encode())
-            time.sleep(0.1)
-            response = self.ser.read_all().decode()
-            return response.strip()
+            self.ser.write(command.encode() + self._term)
+            lines = [self.ser.read_until(self._term)]
+            if nlines is None:
+                while self._wait_for_data(MULTILINE_QUIET_TIME):
+                    lines.append(self.ser.read_until(self._term))
+            else:
+                for _ in range(nlines - 1):
+                    lines.append(self.ser.read_until(self._term))
+            return b''.join(lines).decode().strip()
         except serial.SerialException as e:
             print(f"Serial communication error: {e}")
             return None
 
+    def send_async(self, command):
+        """
+        Queue a command whose response is not needed, such as a setter, and return immediately.
+
+        Queued commands are sent in order by a background thread. send_command and close
+        wait for the queue to empty first, so replies are never mixed up.
+        """
+        if self._worker is None:
+            self._worker = threading.Thread(target=self._drain, daemon=True)
+            self._worker.start()
+        self._queue.put(command)
+
+    def send_command_async(self, command, nlines=1) -> Future:
+        """
+        Send a command from a background thread and return a Future for its response.
+
+        Requests are handled one at a time in the order they were made, which lets a single
+        control thread wait on several instruments at once. Do not mix with send_command
+        while a request is still pending.
+        """
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1)
+        return self._executor.submit(self.send_command, command, nlines)
+
+    def flush(self):
+        """Wait until all commands queued by send_async have been sent and acknowledged."""
+        self._queue.join()
+
+    def _drain(self):
+        """Send queued commands one at a time and discard their replies."""
+        while True:
+            command = self._queue.get()
+            if command is None:
+                # Sentinel queued by close
+                self._queue.task_done()
+                return
+            try:
+                self.ser.write(command.encode() + self._term)
+                self.ser.read_until(self._term)
+            except serial.SerialException as e:
+                print(f"Serial communication error: {e}")
+            except Exception as e:
+                # Keep the worker alive, otherwise flush would wait forever for the remaining commands
+                print(f"Error sending {command!r}: {e}")
+            finally:
+                self._queue.task_done()
+
+    def _wait_for_data(self, timeout):
+        """Return True once data is waiting on the port, or False after timeout seconds."""
+        if self.ser.in_waiting:
+            return True
+        if os.name == 'posix':
+            # Sleep in the kernel until the port becomes readable
+            readable, _, _ = select.select([self.ser.fileno()], [], [], timeout)
+            return bool(readable)
+        deadline = time.monotonic() + timeout
+        while not self.ser.in_waiting:
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(0.001)
+        return True
+
     def get_id(self):
         """Return the laser's ID."""
         return self.send_command("id?")
 
     def get_commands(self):
         """Return a list of available commands for the laser."""
-        return self.send_command("?")
+        return self.send_command("?", nlines=None)
 
     def set_target_temp(self, temp):
         """Set the target temperature of the laser and return the response."""
@@ -61,7 +151,7 @@ class TLLFL:
 
     def get_specs(self):
         """Return the specifications of the laser."""
-        return self.send_command("specs?")
+        return self.send_command("specs?", nlines=None)
 
     def set_step(self, step):
         """Set the step value for the laser and return the response."""
@@ -81,4 +171,12 @@ class TLLFL:
 
     def close(self):
         """Close the serial connection to the laser."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        self.flush()
+        if self._worker is not None:
+            self._queue.put(None)
+            self._worker.join()
+            self._worker = None
         self.ser.close()
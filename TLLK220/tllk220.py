@@ -27,6 +27,13 @@ class TLLK220(DLLWrapper):
             ("SetTargetTemp", [ctypes.c_int, ctypes.c_int], ctypes.c_int),
             ("Close", [ctypes.c_int], ctypes.c_int),
         ])
+
+        # Buffer reused by the device enumeration calls
+        self._enum_buf = ctypes.create_string_buffer(1024)
+
+        # Serial number of the last opened device, encoded for the DLL
+        self._sn = None
+        self._sn_bytes = None
         
     def list(self) -> List[Tuple[str, str]]:
         """
@@ -35,15 +42,14 @@ class TLLK220(DLLWrapper):
         :return: The LK220 device list, each device item is a tuple of (serialNumber, COM)
         :rtype: List[Tuple[str, str]]
         """
-        serial_no = ctypes.create_string_buffer(1024)
-        result = self._dll.List(ctypes.byref(serial_no))
+        serial_no = self._enum_buf
+        serial_no[0] = b'\x00'
+        result = self._dll.List(serial_no)
         self.__test_for_error(result)
-        try:
-            devices_str = serial_no.value.decode("utf-8", "ignore").rstrip('\x00').split(',')
-            devices = [(devices_str[i], devices_str[i + 1]) for i in range(0, len(devices_str), 2) if devices_str[i]]
-        except Exception as e:
-            return [result]
-        return devices
+        devices_str = serial_no.value.decode("utf-8", "ignore").split(',')
+        # Pair up consecutive (serialNumber, COM) entries, skipping empty fields
+        it = iter(filter(None, devices_str))
+        return list(zip(it, it))
     
     def open(self, serial_no: str, n_baud: int, timeout: int) -> int:
         """
@@ -55,7 +61,10 @@ class TLLK220(DLLWrapper):
         :return: A non-negative handle number if the port is opened successfully; a negative number if it fails.
         :rtype: int
         """
-        result = self._dll.Open(ctypes.c_char_p(serial_no.encode()), ctypes.c_int(n_baud), ctypes.c_int(timeout))
+        if serial_no != self._sn:
+            self._sn = serial_no
+            self._sn_bytes = serial_no.encode()
+        result = self._dll.Open(self._sn_bytes, n_baud, timeout)
         self.__test_for_error(result)
         return result
 
@@ -68,7 +77,7 @@ class TLLK220(DLLWrapper):
         :return: 0 if successful; 0xEA for CMD_NOT_DEFINED; 0xEB for timeout.
         :rtype: int
         """
-        result = self._dll.SetEnable(ctypes.c_int(hdl), ctypes.c_int(value))
+        result = self._dll.SetEnable(hdl, value)
         self.__test_for_error(result)
         return result
 
@@ -81,7 +90,7 @@ class TLLK220(DLLWrapper):
         :return: 0 if successful; 0xEA for CMD_NOT_DEFINED; 0xEB for timeout.
         :rtype: int
         """
-        result = self._dll.SetTargetTemp(ctypes.c_int(hdl), ctypes.c_int(value))
+        result = self._dll.SetTargetTemp(hdl, value)
         self.__test_for_error(result)
         return result
     
@@ -93,7 +102,7 @@ class TLLK220(DLLWrapper):
         :return: 0 if successful; a negative number if it fails.
         :rtype: int
         """
-        result = self._dll.Close(ctypes.c_int(hdl))
+        result = self._dll.Close(hdl)
         self.__test_for_error(result)
         return result
 
@@ -1,100 +1,390 @@
+import asyncio
+import contextlib
+import os
+import select
 import serial
+import sys
+import threading
+import time
+
+try:
+    import serial_asyncio
+except ImportError:
+    serial_asyncio = None
+
+
+# USB-serial adapters hold back short replies for up to 16 ms unless the port is in
+# low latency mode. FTDI adapters also have their own latency timer in sysfs.
+def _set_low_latency(ser):
+    if not sys.platform.startswith('linux'):
+        return
+    try:
+        import fcntl
+        import struct
+        TIOCGSERIAL = 0x541E
+        TIOCSSERIAL = 0x541F
+        ASYNC_LOW_LATENCY = 0x2000
+        buf = bytearray(0x60)
+        fcntl.ioctl(ser.fileno(), TIOCGSERIAL, buf)
+        flags = struct.unpack_from('i', buf, 4)[0] | ASYNC_LOW_LATENCY
+        struct.pack_into('i', buf, 4, flags)
+        fcntl.ioctl(ser.fileno(), TIOCSSERIAL, buf)
+    except (OSError, ImportError):
+        pass
+    tty = os.path.basename(os.path.realpath(ser.port))
+    try:
+        with open(f"/sys/bus/usb-serial/devices/{tty}/latency_timer", 'w') as f:
+            f.write('1')
+    except OSError:
+        # Not an FTDI adapter, or no permission to change it
+        pass
+
+
+# Seconds a query response is reused before the device is asked again. None keeps it until
+# a command in the same namespace (the part before the first ':') changes a setting.
+CACHE_TTL = {
+    "SYStem:MODEL?": None,
+    "SYStem:SERial?": None,
+    "SYStem:FIRMware?": None,
+    "SYStem:HARDware?": None,
+    "SYStem:BOOTloader?": None,
+    "SYStem:WAVElength?": None,
+    "LASer:FREQ_NOMinal?": None,
+    "LASer:WAVE_NOMinal?": None,
+    "LASer:SELect?": None,
+    "LASer:FREQuency?": 0.5,
+}
+
+
+# Setter commands buffered inside MX10B.pipeline() are written once this many bytes are pending
+TX_BUF_LIMIT = 512
+
+# Setters by name: command template, check of the value and the error raised when it fails
+_SPEC = {
+    'crossing_point_analog': (b"AMP:CROSSing:ANAlog:%b\n", lambda n: -1.0 <= n <= 1.0, "N must be a floating-point value between -1.0 and 1.0."),
+    'crossing_point_digital': (b"AMP:CROSSing:DIGital:%b\n", lambda n: -1.0 <= n <= 1.0, "N must be a floating-point value between -1.0 and 1.0."),
+    'gain': (b"AMP:GAIN:%b\n", lambda n: 10.0 <= n <= 23.0, "N must be a floating-point value between 10.0 and 23.0."),
+    'amplifier_mode': (b"AMP:MODE:%b\n", lambda n: n in [0, 1], "Mode must be 0 (Digital) or 1 (Analog)."),
+    'amplifier_power': (b"AMP:POWer:%b\n", lambda n: n in [0, 1], "State must be 0 (Off) or 1 (On)."),
+    'amplifier_swing': (b"AMP:SWING:%b\n", None, None),
+    'ITU_channel_number': (b"LASer:CHANnel:%b\n", None, None),
+    'fine_tuning_frequency_offset': (b"LASer:FINE:%b\n", lambda n: -30000 <= n <= 30000, "N must be an integer between -30,000 and 30,000. Units is MHz."),
+    'dither_amplitude': (b"MZM:Dither:AMPLitude:%b\n", lambda n: 20 <= n <= 2000, "n must be an integer between 20 and 2000. Units of mVpp."),
+    'dither_frequency': (b"MZM:Dither:FREQuency:%b\n", lambda n: 1000 <= n <= 10000, "n must be an integer between 1000 and 10000. Units of Hz."),
+    'hold_ratio': (b"MZM:HOLD:Ratio:%b\n", lambda n: 250 <= n <= 10000, "n must be an integer between 250 and 10000."),
+    'hold_voltage': (b"MZM:HOLD:Voltage:%b\n", lambda n: -10000 <= n <= 10000, "n must be an integer between -10000 and 10000. Units of mV."),
+    # add comments on what each mode does
+    'mzm_bias_mode': (b"MZM:MODE:%b\n", lambda n: 0 <= n <= 9, "n must be an integer between 0 and 9."),
+    'system_wavelength': (b"SYStem:WAVElength:%b\n", lambda n: n in [1310, 1550, 1590], "n must be an integer of 1310, 1550, or 1590. Units in nm."),
+    'red_led_brightness': (b"RGB:RED:%b\n", lambda n: 0 <= n <= 100, "n must be an integer between 0 and 100."),
+    'green_led_brightness': (b"RGB:GREEN:%b\n", lambda n: 0 <= n <= 100, "n must be an integer between 0 and 100."),
+    'blue_led_brightness': (b"RGB:BLUE:%b\n", lambda n: 0 <= n <= 100, "n must be an integer between 0 and 100."),
+    'white_led_brightness': (b"RGB:WHITE:%b\n", lambda n: 0 <= n <= 100, "n must be an integer between 0 and 100."),
+    'leds_power_mode': (b"RGB:POWer:%b\n", None, None),
+    'optical_attenuation': (b"VOA:ATTen:%b\n", lambda n: 1.0 <= n <= 20.0, "n must be a float between 1.0 and 20.0. Units in dB."),
+    'optical_output_dbm': (b"VOA:OUTput:DBM:%b\n", lambda n: -20.0 <= n <= 20.0, "n must be a float between -20.0 and 20.0. Units in dBm."),
+    'optical_output_mw': (b"VOA:OUTput:MW:%b\n", lambda n: 0.01 <= n <= 100.0, "n must be a float between 0.01 and 100.0. Units in mW."),
+}
+
+# Getters by name: query command and the type of its response
+_GET = {
+    'crossing_point_analog': ("AMP:CROSSing:ANAlog?", float),
+    'crossing_point_digital': ("AMP:CROSSing:DIGital?", float),
+    'gain': ("AMP:GAIN?", float),
+    'amplifier_mode': ("AMP:MODE?", int),
+    'amplifier_power_status': ("AMP:POWer?", int),
+    'amplifier_status': ("AMP:SETpoint?", int),
+    'amplifier_swing': ("AMP:SWING?", float),
+    'ITU_channel_number': ("LASer:CHANnel?", int),
+    'dither_status': ("LASer:Dither?", int),
+    'fine_tuning_frequency_offset': ("LASer:FINE?", int),
+    'optical_laser_frequency': ("LASer:FREQuency?", float),  # GHz
+    'nominal_laser_frequency': ("LASer:FREQ_NOMinal?", int),
+    'reported_optical_output_power': ("LASer:OOP?", float),  # dBm
+    'laser_power_status': ("LASer:POWer?", int),
+    'selected_laser': ("LASer:SELect?", str),
+    'laser_status': ("LASer:SETpoint?", int),
+    'measured_optical_output_power_dBm': ("LASer:TAP:DBM?", float),
+    'measured_optical_output_power_mW': ("LASer:TAP:MW?", float),
+    'nominal_laser_wavelength': ("LASer:WAVE_NOMinal?", int),
+    'calibration_status': ("MZM:CALibrating?", int),
+    'dither_amplitude': ("MZM:Dither:AMPLitude?", int),
+    'dither_frequency': ("MZM:Dither:FREQuency?", int),
+    'hold_ratio': ("MZM:HOLD:Ratio?", int),
+    'hold_voltage': ("MZM:HOLD:Voltage?", int),
+    'mzm_bias_mode': ("MZM:MODE?", int),
+    'mzm_status': ("MZM:SETpoint?", int),
+    'post_mzm_power_dBm': ("MZM:TAP:DBM?", float),
+    'post_mzm_power_mW': ("MZM:TAP:MW?", float),
+    'mzm_bias_voltage': ("MZM:Voltage?", float),
+    'system_bootloader_version': ("SYStem:BOOTloader?", str),
+    'system_firmware_version': ("SYStem:FIRMware?", str),
+    'system_hardware_version': ("SYStem:HARDware?", str),
+    'system_model_number': ("SYStem:MODEL?", str),
+    'system_serial_number': ("SYStem:SERial?", str),
+    'system_wavelength': ("SYStem:WAVElength?", int),
+    'red_led_brightness': ("RGB:RED?", int),
+    'green_led_brightness': ("RGB:GREEN?", int),
+    'blue_led_brightness': ("RGB:BLUE?", int),
+    'white_led_brightness': ("RGB:WHITE?", int),
+    'led_power_status': ("RGB:POWer?", int),
+    'optical_attenuation': ("VOA:ATTen?", float),
+    'attenuation_error': ("VOA:ERRor?", float),
+    'measured_attenuation': ("VOA:MEASured?", float),
+    'voa_mode': ("VOA:MODE?", int),
+    'optical_output_dbm': ("VOA:OUTput:DBM?", float),
+    'optical_output_mw': ("VOA:OUTput:MW?", float),
+    'voa_power_status': ("VOA:POWer?", int),
+    'voa_status': ("VOA:SETpoint?", int),
+    'optical_power_output_dbm': ("VOA:TAP:DBM?", float),
+    'optical_power_output_mw': ("VOA:TAP:MW?", float),
+}
+
 
 class MX10B:
+    # Instances shared through MX10B.get, keyed by port
+    _instances = {}
+    _instances_lock = threading.Lock()
+
     def __init__(self, port):
+        self.port = port
         self.serial_port = serial.Serial(port, baudrate=115200, bytesize=8, parity='N', stopbits=1, timeout=1)
+        _set_low_latency(self.serial_port)
+        # On POSIX commands are written straight to the port's descriptor, see _write
+        self._fd = self.serial_port.fileno() if os.name == 'posix' else None
+
+        self._cache_ttl = dict(CACHE_TTL)
+        # command -> (time of the response, response)
+        self._cache = {}
+        self._lock = threading.RLock()
+        # Encoded query commands, see send_command
+        self._encoded = {}
+        # Setter commands waiting to be written, see pipeline
+        self._tx_buf = bytearray()
+        self._pipelining = False
+
+        # Number of users of this instance, see get and close
+        self._refs = 1
+        self._keepalive_stop = threading.Event()
+        self._keepalive_thread = None
+        # Time of the last write, the keepalive only queries an idle port
+        self._last_io = 0.0
+
+    @classmethod
+    def get(cls, port, keepalive=None):
+        # Returns the open instance for port, or opens one. Each call must be matched by close().
+        # With keepalive in seconds, a background thread queries the device at that interval.
+        with cls._instances_lock:
+            instance = cls._instances.get(port)
+            if instance is not None:
+                instance._refs += 1
+            else:
+                instance = cls(port)
+                cls._instances[port] = instance
+            if keepalive is not None and instance._keepalive_thread is None:
+                instance._keepalive_thread = threading.Thread(target=instance._keepalive, args=(keepalive,), daemon=True)
+                instance._keepalive_thread.start()
+        return instance
+
+    def _keepalive(self, interval):
+        while not self._keepalive_stop.wait(interval):
+            with self._lock:
+                # Any recent write keeps the link alive, and its reply may not have been read yet,
+                # e.g. between send_command and read_response, so only an idle port is queried
+                if time.monotonic() - self._last_io < interval:
+                    continue
+                try:
+                    self.get_laser_power_status()
+                except (serial.SerialException, ValueError):
+                    pass
+
+    def close(self):
+        # Releases this user of the instance, and closes the port once it has no users left
+        with MX10B._instances_lock:
+            self._refs -= 1
+            if self._refs > 0:
+                return
+            if MX10B._instances.get(self.port) is self:
+                del MX10B._instances[self.port]
+        self._keepalive_stop.set()
+        if self._keepalive_thread is not None:
+            self._keepalive_thread.join()
+        with self._lock:
+            self.sync()
+            self.serial_port.close()
     
     def send_command(self, command):
-        command = command + '\n'
-        self.serial_port.write(command.encode('ascii'))
+        if not command.endswith('?') and self._cache:
+            self._invalidate(command.split(':', 1)[0])
+        data = self._encoded.get(command)
+        if data is None:
+            data = (command + '\n').encode('ascii')
+            if command.endswith('?'):
+                # Queries are fixed strings, so keep their encoded form
+                self._encoded[command] = data
+        with self._lock:
+            if self._tx_buf:
+                self._flush_tx()
+            self._write(data)
+
+    def _write(self, data):
+        # Called with self._lock held. pyserial opens the port non-blocking, so a full output
+        # buffer only needs a wait for the descriptor to become writable again
+        self._last_io = time.monotonic()
+        if self._fd is None:
+            self.serial_port.write(data)
+            return
+        view = memoryview(data)
+        while view:
+            try:
+                view = view[os.write(self._fd, view):]
+            except BlockingIOError:
+                _, writable, _ = select.select([], [self._fd], [], self.serial_port.write_timeout)
+                if not writable:
+                    raise serial.SerialTimeoutException("Write timeout")
+
+    def _send_setting(self, template, value):
+        # Writes a setter from its byte template without building intermediate strings
+        if self._cache:
+            self._invalidate(template.split(b':', 1)[0].decode('ascii'))
+        data = template % str(value).encode('ascii')
+        with self._lock:
+            if self._pipelining:
+                self._tx_buf += data
+                if len(self._tx_buf) >= TX_BUF_LIMIT:
+                    self._flush_tx()
+            else:
+                self._write(data)
+
+    def _flush_tx(self):
+        # Writes the setter commands buffered by pipeline in one transfer
+        with self._lock:
+            data = bytes(self._tx_buf)
+            self._tx_buf.clear()
+            self._write(data)
+
+    @contextlib.contextmanager
+    def pipeline(self):
+        # Inside this block setters are collected and written together, once TX_BUF_LIMIT bytes
+        # are pending, before the next query or other command, or when the block ends.
+        #   with mx10b.pipeline():
+        #       for n in range(100):
+        #           mx10b.set_red_led_brightness(n)
+        self._pipelining = True
+        try:
+            yield self
+        finally:
+            self._pipelining = False
+            self.sync()
+
+    def sync(self):
+        # Writes any buffered setters and waits until everything has left the port
+        with self._lock:
+            if self._tx_buf:
+                self._flush_tx()
+            self.serial_port.flush()
+
+    def _invalidate(self, namespace):
+        # A setting changed, so forget cached responses from the same namespace
+        prefix = namespace + ':'
+        with self._lock:
+            for key in [key for key in self._cache if key.startswith(prefix)]:
+                del self._cache[key]
         
     def read_response(self):
-        response = self.serial_port.readline().decode('ascii').strip()
+        with self._lock:
+            response = self.serial_port.read_until(b'\n').decode('ascii').strip()
         return response
-    
 
-    ### RF Amplifier Commands ###
-        
-    def set_crossing_point_analog(self, n):
-        if -1.0 <= n <= 1.0:
-            command = f"AMP:CROSSing:ANAlog:{n}"
+    def _read_int(self):
+        # int() accepts bytes and ignores surrounding whitespace
+        with self._lock:
+            return int(self.serial_port.read_until(b'\n'))
+
+    def query(self, command):
+        # Sends a query and returns its response, reusing a recent response for commands in the cache table
+        with self._lock:
+            if command in self._cache_ttl:
+                entry = self._cache.get(command)
+                if entry is not None:
+                    ttl = self._cache_ttl[command]
+                    if ttl is None or time.monotonic() - entry[0] < ttl:
+                        return entry[1]
+                self.send_command(command)
+                response = self.read_response()
+                self._cache[command] = (time.monotonic(), response)
+                return response
             self.send_command(command)
-        else:
-            raise ValueError("N must be a floating-point value between -1.0 and 1.0.")
+            return self.read_response()
+
+    def sweep(self, setting, values, query, dwell=0, chunk_n=32):
+        # Steps a setting through values and returns the float response of query after each step.
+        # setting is a key of _SPEC such as 'gain', query a command such as "VOA:MEASured?".
+        # The values are not range checked here. Without a dwell time the set/query pairs of
+        # chunk_n points are written in one transfer before their responses are read.
+        # Imported here, so MX10B can be used without numpy installed
+        import numpy as np
+        template = _SPEC[setting][0]
+        query_data = (query + '\n').encode('ascii')
+        values = list(values)
+        results = np.empty(len(values), dtype=np.float64)
+        write = self._write
+        read_until = self.serial_port.read_until
+        with self._lock:
+            if self._tx_buf:
+                self._flush_tx()
+            self._invalidate(template.split(b':', 1)[0].decode('ascii'))
+            if dwell > 0:
+                for i, value in enumerate(values):
+                    write(template % str(value).encode('ascii'))
+                    time.sleep(dwell)
+                    write(query_data)
+                    results[i] = float(read_until(b'\n'))
+            else:
+                for start in range(0, len(values), chunk_n):
+                    chunk = values[start:start + chunk_n]
+                    write(b''.join(template % str(value).encode('ascii') + query_data for value in chunk))
+                    for i in range(start, start + len(chunk)):
+                        results[i] = float(read_until(b'\n'))
+        return results
+
+    def cache_clear(self):
+        with self._lock:
+            self._cache.clear()
+
+    def set_cache_ttl(self, command, ttl):
+        # ttl in seconds, None caches until invalidated, 0 stops caching the command
+        with self._lock:
+            self._cache.pop(command, None)
+            if ttl == 0:
+                self._cache_ttl.pop(command, None)
+            else:
+                self._cache_ttl[command] = ttl
+
+    def send_batch(self, commands):
+        # Writes several commands that have no response in a single transfer
+        if self._cache:
+            for namespace in {command.split(':', 1)[0] for command in commands if not command.endswith('?')}:
+                self._invalidate(namespace)
+        with self._lock:
+            if self._tx_buf:
+                self._flush_tx()
+            self._write(''.join(command + '\n' for command in commands).encode('ascii'))
+
+    def query_batch(self, queries):
+        # Writes several queries in a single transfer, then reads one response line per query
+        with self._lock:
+            self.send_batch(queries)
+            return [self.read_response() for _ in queries]
     
-    def get_crossing_point_analog(self):
-        command = "AMP:CROSSing:ANAlog?"
-        self.send_command(command)
-        response = self.read_response()
-        return float(response)
-    
-    def set_crossing_point_digital(self, n):
-        if -1.0 <= n <= 1.0:
-            command = f"AMP:CROSSing:DIGital:{n}"
-            self.send_command(command)
-        else:
-            raise ValueError("N must be a floating-point value between -1.0 and 1.0.")
-    
-    def get_crossing_point_digital(self):
-        command = "AMP:CROSSing:DIGital?"
-        self.send_command(command)
-        response = self.read_response()
-        return float(response)
-
-    def set_gain(self, n):
-        if 10.0 <= n <= 23.0:
-            command = f"AMP:GAIN:{n}"
-            self.send_command(command)
-        else:
-            raise ValueError("N must be a floating-point value between 10.0 and 23.0.")
-    
-    def get_gain(self):
-        command = "AMP:GAIN?"
-        self.send_command(command)
-        response = self.read_response()
-        return float(response)
 
+    ### RF Amplifier Commands ###
+        
     def set_amplifier_mode(self, mode):
-        if mode in [0, 1]:
-            command = f"AMP:MODE:{mode}"
-            self.send_command(command)
-        else:
-            raise ValueError("Mode must be 0 (Digital) or 1 (Analog).")
-
-    def get_amplifier_mode(self):
-        command = "AMP:MODE?"
-        self.send_command(command)
-        response = self.read_response()
-        return int(response)
+        _SETTERS['amplifier_mode'](self, mode)
 
     def set_amplifier_power(self, state):
-        if state in [0, 1]:
-            command = f"AMP:POWer:{state}"
-            self.send_command(command)
-        else:
-            raise ValueError("State must be 0 (Off) or 1 (On).")
-
-    def get_amplifier_power_status(self):
-        command = "AMP:POWer?"
-        self.send_command(command)
-        response = self.read_response()
-        return int(response)
-
-    def get_amplifier_status(self):
-        command = "AMP:SETpoint?"
-        self.send_command(command)
-        response = self.read_response()
-        return int(response)
-
-    def set_amplifier_swing(self, n):
-        command = f"AMP:SWING:{n}"
-        self.send_command(command)
-
-    def get_amplifier_swing(self):
-        command = "AMP:SWING?"
-        self.send_command(command)
-        response = self.read_response()
-        return float(response)
+        _SETTERS['amplifier_power'](self, state)
 
     def set_amplifier_swing_vpi(self):
         command = "AMP:SWING:VPI"
@@ -102,16 +392,6 @@ class MX10B:
 
     ### Laser Commands ###
 
-    def set_ITU_channel_number(self, n):
-        command = f"LASer:CHANnel:{n}"
-        self.send_command(command)
-
-    def get_ITU_channel_number(self):
-        command = "LASer:CHANnel?"
-        self.send_command(command)
-        response = self.read_response()
-        return int(response)
-
     def set_dither_on(self):
         command = "LASer:Dither:1"
         self.send_command(command)
@@ -120,43 +400,6 @@ class MX10B:
         command = "LASer:Dither:0"
         self.send_command(command)
 
-    def get_dither_status(self):
-        command = "LASer:Dither?"
-        self.send_command(command)
-        response = self.read_response()
-        return int(response)
-
-    def set_fine_tuning_frequency_offset(self, n):
-        assert -30000 <= n <= 30000, "N must be an integer between -30,000 and 30,000. Units is MHz."
-        command = f"LASer:FINE:{n}"
-        self.send_command(command)
-
-    def get_fine_tuning_frequency_offset(self):
-        command = "LASer:FINE?"
-        self.send_command(command)
-        response = self.read_response()
-        return int(response)
-
-    def get_optical_laser_frequency(self):
-        # Output is in GHz
-        command = "LASer:FREQuency?"
-        self.send_command(command)
-        response = self.read_response()
-        return float(response)
-
-    def get_nominal_laser_frequency(self):
-        command = "LASer:FREQ_NOMinal?"
-        self.send_command(command)
-        response = self.read_response()
-        return int(response)
-
-    def get_reported_optical_output_power(self):
-        # Units is in dBm
-        command = "LASer:OOP?"
-        self.send_command(command)
-        response = self.read_response()
-        return float(response)
-
     def set_laser_power_on(self):
         command = "LASer:POWer:1"
         self.send_command(command)
@@ -166,291 +409,51 @@ class MX10B:
         command = "LASer:POWer:0"
         self.send_command(command)
 
-    def get_laser_power_status(self):
-        command = "LASer:POWer?"
-        self.send_command(command)
-        response = self.read_response()
-        return int(response)
-
     def select_c_band_laser(self):
         command = "LASer:SELect:Cband"
-        self.send_command(command)
-        response = self.read_response()
-        return int(response)
+        with self._lock:
+            self.send_command(command)
+            return self._read_int()
 
     def select_l_band_laser(self):
         command = "LASer:SELect:Lband"
-        self.send_command(command)
-        response = self.read_response()
-        return int(response)
+        with self._lock:
+            self.send_command(command)
+            return self._read_int()
 
     def select_1310nm_laser(self):
         command = "LASer:SELect:1310"
-        self.send_command(command)
-        response = self.read_response()
-        return int(response)
-
-    def get_selected_laser(self):
-        command = "LASer:SELect?"
-        self.send_command(command)
-        response = self.read_response()
-        return response
-    
-    def get_laser_status(self):
-        command = "LASer:SETpoint?"
-        self.send_command(command)
-        response = self.read_response()
-        return int(response)
-
-    def get_measured_optical_output_power_dBm(self):
-        command = "LASer:TAP:DBM?"
-        self.send_command(command)
-        response = self.read_response()
-        return float(response)
-
-    def get_measured_optical_output_power_mW(self):
-        command = "LASer:TAP:MW?"
-        self.send_command(command)
-        response = self.read_response()
-        return float(response)
+        with self._lock:
+            self.send_command(command)
+            return self._read_int()
 
-    def get_nominal_laser_wavelength(self):
-        command = "LASer:WAVE_NOMinal?"
-        self.send_command(command)
-        response = self.read_response()
-        return int(response)
-    
     ## Mach zehnder commands ##
 
-    def get_calibration_status(self):
-        command = "MZM:CALibrating?"
-        self.send_command(command)
-        response = self.read_response()
-        return int(response)
-
-    def set_dither_amplitude(self, n):
-        assert 20<= n <= 2000, "n must be an integer between 20 and 2000. Units of mVpp."
-        command = f"MZM:Dither:AMPLitude:{n}"
-        self.send_command(command)
-
-    def get_dither_amplitude(self):
-        command = "MZM:Dither:AMPLitude?"
-        self.send_command(command)
-        response = self.read_response()
-        return int(response)
-
-    def set_dither_frequency(self, n):
-        assert 1000 <= n <= 10000, "n must be an integer between 1000 and 10000. Units of Hz."
-        command = f"MZM:Dither:FREQuency:{n}"
-        self.send_command(command)
-
-    def get_dither_frequency(self):
-        command = "MZM:Dither:FREQuency?"
-        self.send_command(command)
-        response = self.read_response()
-        return int(response)
-
-    def set_hold_ratio(self, n):
-        assert 250 <= n <= 10000, "n must be an integer between 250 and 10000."
-        command = f"MZM:HOLD:Ratio:{n}"
-        self.send_command(command)
-
-    def get_hold_ratio(self):
-        command = "MZM:HOLD:Ratio?"
-        self.send_command(command)
-        response = self.read_response()
-        return int(response)
-
-    def set_hold_voltage(self, n):
-        assert -10000 <= n <= 10000, "n must be an integer between -10000 and 10000. Units of mV."
-        command = f"MZM:HOLD:Voltage:{n}"
-        self.send_command(command)
-
-    def get_hold_voltage(self):
-        command = "MZM:HOLD:Voltage?"
-        self.send_command(command)
-        response = self.read_response()
-        return int(response)
-
-    def set_mzm_bias_mode(self, n):
-        # add comments on what each mode does
-        assert 0 <= n <= 9, "n must be an integer between 0 and 9."
-        command = f"MZM:MODE:{n}"
-        self.send_command(command)
-
-    def get_mzm_bias_mode(self):
-        command = "MZM:MODE?"
-        self.send_command(command)
-        response = self.read_response()
-        return int(response)
-
     def trigger_mzm_calibration(self):
         command = "MZM:RESET"
-        self.send_command(command)
-        response = self.read_response()
-        return int(response)
-
-    def get_mzm_status(self):
-        command = "MZM:SETpoint?"
-        self.send_command(command)
-        response = self.read_response()
-        return int(response)
-
-    def get_post_mzm_power_dBm(self):
-        command = "MZM:TAP:DBM?"
-        self.send_command(command)
-        response = self.read_response()
-        return float(response)
-
-    def get_post_mzm_power_mW(self):
-        command = "MZM:TAP:MW?"
-        self.send_command(command)
-        response = self.read_response()
-        return float(response)
+        with self._lock:
+            self.send_command(command)
+            return self._read_int()
 
-    def get_mzm_bias_voltage(self):
-        command = "MZM:Voltage?"
-        self.send_command(command)
-        response = self.read_response()
-        return float(response)
- 
     ## System commands ##
 
-    def get_system_bootloader_version(self):
-        command = "SYStem:BOOTloader?"
-        self.send_command(command)
-        response = self.read_response()
-        return response
-
-    def get_system_firmware_version(self):
-        command = "SYStem:FIRMware?"
-        self.send_command(command)
-        response = self.read_response()
-        return response
-
-    def get_system_hardware_version(self):
-        command = "SYStem:HARDware?"
-        self.send_command(command)
-        response = self.read_response()
-        return response
-
-    def get_system_model_number(self):
-        command = "SYStem:MODEL?"
-        self.send_command(command)
-        response = self.read_response()
-        return response
-
     def trigger_restart(self):
         command = "SYStem:RESTART"
         self.send_command(command)
 
-    def get_system_serial_number(self):
-        command = "SYStem:SERial?"
-        self.send_command(command)
-        response = self.read_response()
-        return response
-
     def trigger_sleep(self):
         command = "SYStem:SLEEP"
-        self.send_command(command)
-        response = self.read_response()
-        return int(response)
+        with self._lock:
+            self.send_command(command)
+            return self._read_int()
 
     def trigger_wake(self):
         command = "SYStem:WAKE"
-        self.send_command(command)
-        response = self.read_response()
-        return int(response)
-
-    def set_system_wavelength(self, n):
-        assert n in [1310, 1550, 1590], "n must be an integer of 1310, 1550, or 1590. Units in nm."
-        command = f"SYStem:WAVElength:{n}"
-        self.send_command(command)
-
-    def get_system_wavelength(self):
-        command = "SYStem:WAVElength?"
-        self.send_command(command)
-        response = self.read_response()
-        return int(response)
-
-    def set_red_led_brightness(self, n):
-        assert 0 <= n <= 100, "n must be an integer between 0 and 100."
-        command = f"RGB:RED:{n}"
-        self.send_command(command)
-
-    def get_red_led_brightness(self):
-        command = "RGB:RED?"
-        self.send_command(command)
-        response = self.read_response()
-        return int(response)
-
-    def set_green_led_brightness(self, n):
-        assert 0 <= n <= 100, "n must be an integer between 0 and 100."
-        command = f"RGB:GREEN:{n}"
-        self.send_command(command)
-
-    def get_green_led_brightness(self):
-        command = "RGB:GREEN?"
-        self.send_command(command)
-        response = self.read_response()
-        return int(response)
-
-    def set_blue_led_brightness(self, n):
-        assert 0 <= n <= 100, "n must be an integer between 0 and 100."
-        command = f"RGB:BLUE:{n}"
-        self.send_command(command)
-
-    def get_blue_led_brightness(self):
-        command = "RGB:BLUE?"
-        self.send_command(command)
-        response = self.read_response()
-        return int(response)
-
-    def set_white_led_brightness(self, n):
-        assert 0 <= n <= 100, "n must be an integer between 0 and 100."
-        command = f"RGB:WHITE:{n}"
-        self.send_command(command)
-
-    def get_white_led_brightness(self):
-        command = "RGB:WHITE?"
-        self.send_command(command)
-        response = self.read_response()
-        return int(response)
-
-    def set_leds_power_mode(self, n):
-        command = f"RGB:POWer:{n}"
-        self.send_command(command)
-
-    def get_led_power_status(self):
-        command = "RGB:POWer?"
-        self.send_command(command)
-        response = self.read_response()
-        return int(response)
+        with self._lock:
+            self.send_command(command)
+            return self._read_int()
 
     ## VOA commands ##
-    def set_optical_attenuation(self, n):
-        assert 1.0 <= n <= 20.0, "n must be a float between 1.0 and 20.0. Units in dB."
-        command = f"VOA:ATTen:{n}"
-        self.send_command(command)
-
-    def get_optical_attenuation(self):
-        command = "VOA:ATTen?"
-        self.send_command(command)
-        response = self.read_response()
-        return float(response)
-
-    def get_attenuation_error(self):
-        command = "VOA:ERRor?"
-        self.send_command(command)
-        response = self.read_response()
-        return float(response)
-
-    def get_measured_attenuation(self):
-        command = "VOA:MEASured?"
-        self.send_command(command)
-        response = self.read_response()
-        return float(response)
-
     def set_voa_mode_constant_output(self):
         command = "VOA:MODE:1"
         self.send_command(command)
@@ -459,35 +462,13 @@ class MX10B:
         command = "VOA:MODE:0"
         self.send_command(command)
 
-    def get_voa_mode(self):
-        command = "VOA:MODE?"
-        self.send_command(command)
-        response = self.read_response()
-        return int(response)
-
     def set_optical_output_dbm(self, n):
-        assert -20.0 <= n <= 20.0, "n must be a float between -20.0 and 20.0. Units in dBm."
-        command = f"VOA:OUTput:DBM:{n}"
-        self.send_command(command)
-        response = self.read_response()
-        return int(response)
-
-    def get_optical_output_dbm(self):
-        command = "VOA:OUTput:DBM?"
-        self.send_command(command)
-        response = self.read_response()
-        return float(response)
-
-    def set_optical_output_mw(self, n):
-        assert 0.01 <= n <= 100.0, "n must be a float between 0.01 and 100.0. Units in mW."
-        command = f"VOA:OUTput:MW:{n}"
-        self.send_command(command)
-
-    def get_optical_output_mw(self):
-        command = "VOA:OUTput:MW?"
-        self.send_command(command)
-        response = self.read_response()
-        return float(response)
+        # The device answers this setter, so it is written at once even inside pipeline()
+        with self._lock:
+            _SETTERS['optical_output_dbm'](self, n)
+            if self._tx_buf:
+                self._flush_tx()
+            return self._read_int()
 
     def set_voa_power_on(self):
         command = "VOA:POWer:1"
@@ -497,30 +478,86 @@ class MX10B:
         command = "VOA:POWer:0"
         self.send_command(command)
 
-    def get_voa_power_status(self):
-        command = "VOA:POWer?"
-        self.send_command(command)
-        response = self.read_response()
-        return int(response)
-
-    def get_voa_status(self):
-        command = "VOA:SETpoint?"
-        self.send_command(command)
-        response = self.read_response()
-        return int(response)
-
-    def get_optical_power_output_dbm(self):
-        command = "VOA:TAP:DBM?"
-        self.send_command(command)
-        response = self.read_response()
-        return float(response)
-
-    def get_optical_power_output_mw(self):
-        command = "VOA:TAP:MW?"
-        self.send_command(command)
-        response = self.read_response()
-        return float(response)
 
+def _make_setter(template, valid, message):
+    def setter(self, n):
+        if valid is not None and not valid(n):
+            raise ValueError(message)
+        self._send_setting(template, n)
+    return setter
+
+
+def _make_getter(command, cast):
+    data = (command + '\n').encode('ascii')
+
+    def getter(self):
+        if command in self._cache_ttl:
+            return cast(self.query(command))
+        with self._lock:
+            if self._tx_buf:
+                self._flush_tx()
+            self._write(data)
+            if cast is str:
+                return self.read_response()
+            return cast(self.serial_port.read_until(b'\n'))
+    return getter
+
+
+# Setter for every _SPEC entry, with the command and check bound in so a call skips the table lookup.
+# Setters written out in the class, such as set_optical_output_dbm, call these too.
+_SETTERS = {_name: _make_setter(*_spec) for _name, _spec in _SPEC.items()}
+
+# Adds a set_<name> and get_<name> method for every _SPEC and _GET entry not written out in the class.
+# Each getter has its command and response type bound in.
+for _name, _method in _SETTERS.items():
+    if 'set_' + _name not in MX10B.__dict__:
+        _method.__name__ = 'set_' + _name
+        _method.__qualname__ = 'MX10B.set_' + _name
+        _method.__doc__ = f"Sends {_SPEC[_name][0][:-4].decode('ascii')}:<n>"
+        setattr(MX10B, 'set_' + _name, _method)
+for _name, (_command, _cast) in _GET.items():
+    if 'get_' + _name not in MX10B.__dict__:
+        _method = _make_getter(_command, _cast)
+        _method.__name__ = 'get_' + _name
+        _method.__qualname__ = 'MX10B.get_' + _name
+        _method.__doc__ = f"Queries {_command} and returns the response as {_cast.__name__}"
+        setattr(MX10B, 'get_' + _name, _method)
+del _name, _command, _cast, _method
+
+
+class AsyncMX10B:
+    # asyncio version of the MX10B transport, so several devices can be queried from one
+    # event loop while their replies are pending. Needs the pyserial-asyncio package.
+    # Create instances with: mx10b = await AsyncMX10B.connect(port)
+    def __init__(self, reader, writer, timeout=1):
+        self.reader = reader
+        self.writer = writer
+        self.timeout = timeout
+        # Keeps concurrent queries from interleaving their replies
+        self._lock = asyncio.Lock()
+
+    @classmethod
+    async def connect(cls, port, timeout=1):
+        if serial_asyncio is None:
+            raise ImportError("AsyncMX10B needs the pyserial-asyncio package.")
+        reader, writer = await serial_asyncio.open_serial_connection(url=port, baudrate=115200, bytesize=8, parity='N', stopbits=1)
+        return cls(reader, writer, timeout)
+
+    async def send_command(self, command):
+        self.writer.write((command + '\n').encode('ascii'))
+        await self.writer.drain()
+
+    async def read_response(self):
+        response = await asyncio.wait_for(self.reader.readuntil(b'\n'), self.timeout)
+        return response.decode('ascii').strip()
+
+    async def query(self, command):
+        async with self._lock:
+            await self.send_command(command)
+            return await self.read_response()
+
+    def close(self):
+        self.writer.close()
 
 
 # Example usage:
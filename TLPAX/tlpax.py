@@ -1,21 +1,93 @@
 # Uses SCPI commands to communicate with the PAX1000 polarimeter from Thorlabs.
 
+import asyncio
+import atexit
+import functools
 import pyvisa
+import threading
+import time
+from collections import deque, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+# Fields of a primary measurement data set, in the order the instrument reports them
+PrimaryMeasurement = namedtuple("PrimaryMeasurement", [
+    "revs", "timestamp", "paxOpMode", "paxFlags", "paxTIARange", "adcMin", "adcMax",
+    "revTime", "misAdj", "theta", "eta", "DOP", "Ptotal",
+])
+
+# ResourceManager shared by all TLPAX objects, created on first use
+_RM = None
+
+
+def _get_rm():
+    """
+    Return the shared VISA ResourceManager, creating it on first use.
+
+    :return: The shared ResourceManager.
+    :rtype: pyvisa.ResourceManager
+    """
+    global _RM
+    if _RM is None:
+        _RM = pyvisa.ResourceManager()
+        atexit.register(TLPAX.shutdown_rm)
+    return _RM
+
 
 class TLPAX:
     """
     A Python class for controlling the Thorlabs PAX1000 polarimeter using SCPI commands.
     """
-    def __init__(self, resource_name):
+    # Instances shared through TLPAX.get, keyed by resource name
+    _instances = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(self, resource_name, rm=None):
         """
         Initialize the TLPAX object.
 
         :param resource_name: The VISA resource name for the PAX1000 polarimeter.
         :type resource_name: str
+        :param rm: ResourceManager to open the instrument with. Defaults to one shared by all TLPAX objects.
+        :type rm: pyvisa.ResourceManager, optional
         """
-        self.rm = pyvisa.ResourceManager()
+        self.resource_name = resource_name
+        self.rm = rm if rm is not None else _get_rm()
         self.instrument = self.rm.open_resource(resource_name)
         self.instrument.timeout = 5000 # in milliseconds
+
+        # Responses that do not change while the instrument is connected
+        self._cache = {}
+
+        # Serializes instrument access between the caller and the streaming thread
+        self._io_lock = threading.Lock()
+        self._stream_thread = None
+        self._stream_stop = threading.Event()
+        self._ring = deque()
+        self._latest_raw = None
+        # Exception that ended the streaming thread, raised again by the getters
+        self._stream_error = None
+
+        # Number of users of this instance, see get and close
+        self._refs = 1
+
+    @classmethod
+    def get(cls, resource_name):
+        """
+        Return the open TLPAX for a resource, opening it on first use. Each call must be matched by close().
+
+        :param resource_name: The VISA resource name for the PAX1000 polarimeter.
+        :type resource_name: str
+        :return: The shared TLPAX object.
+        :rtype: TLPAX
+        """
+        with cls._instances_lock:
+            instance = cls._instances.get(resource_name)
+            if instance is not None:
+                instance._refs += 1
+            else:
+                instance = cls(resource_name)
+                cls._instances[resource_name] = instance
+            return instance
         
     def send_command(self, command):
         """
@@ -24,7 +96,8 @@ class TLPAX:
         :param command: The SCPI command to send.
         :type command: str
         """
-        self.instrument.write(command)
+        with self._io_lock:
+            self.instrument.write(command)
         
     def query(self, command):
         """
@@ -35,8 +108,45 @@ class TLPAX:
         :return: The response from the instrument.
         :rtype: str
         """
-        return self.instrument.query(command)
+        with self._io_lock:
+            return self.instrument.query(command)
     
+    def _query_raw(self, command):
+        """
+        Query the instrument and return the undecoded response.
+
+        The PAX1000 is a USBTMC device, so each response arrives as one message and read_raw
+        returns it from a single VISA read, skipping pyvisa's decoding and termination handling.
+
+        :param command: The SCPI query command to send.
+        :type command: str
+        :return: The response including its line terminator.
+        :rtype: bytes
+        """
+        with self._io_lock:
+            self.instrument.write(command)
+            return self.instrument.read_raw()
+
+    def query_batch(self, queries, chain=True):
+        """
+        Query the instrument with several commands and return the responses in order.
+
+        :param queries: The SCPI query commands to send.
+        :type queries: list
+        :param chain: If True, send all queries as one ';' separated message and split the single
+            response line. If False, write each query as its own message first and then read the
+            responses, for commands that cannot be chained.
+        :type chain: bool
+        :return: The responses from the instrument.
+        :rtype: list
+        """
+        if chain:
+            return self.query(";".join(queries)).strip().split(";")
+        with self._io_lock:
+            for command in queries:
+                self.instrument.write(command)
+            return [self.instrument.read().strip() for _ in queries]
+
     def get_identification(self):
         """
         Get the identification information of the instrument.
@@ -44,8 +154,9 @@ class TLPAX:
         :return: A list containing the manufacturer, model, serial number, and firmware version.
         :rtype: list
         """
-        idn = self.query("*IDN?")
-        return idn.split(",")
+        if "*IDN?" not in self._cache:
+            self._cache["*IDN?"] = self.query("*IDN?")
+        return self._cache["*IDN?"].split(",")
 
     def reset(self):
         """
@@ -74,12 +185,36 @@ class TLPAX:
         """
         return self.query("*TST?")
     
+    def cache_clear(self):
+        """
+        Forget cached responses so the next identification and calibration queries ask the instrument again.
+        """
+        self._cache.clear()
+
     def close(self):
         """
-        Close the connection to the instrument.
+        Close the connection to the instrument. The shared ResourceManager stays open for other instruments.
+        An instance returned by get is only closed once every user has called close.
         """
+        with TLPAX._instances_lock:
+            self._refs -= 1
+            if self._refs > 0:
+                return
+            if TLPAX._instances.get(self.resource_name) is self:
+                del TLPAX._instances[self.resource_name]
+        self.stop_streaming()
         self.instrument.close()
 
+    @classmethod
+    def shutdown_rm(cls):
+        """
+        Close the shared ResourceManager. Called automatically when the interpreter exits.
+        """
+        global _RM
+        if _RM is not None:
+            _RM.close()
+            _RM = None
+
     def set_averaging_mode(self, mode):
         """
         Set the averaging mode for the polarimeter.
@@ -207,7 +342,131 @@ class TLPAX:
         """
         # Returns latest completed primary measurement data set:
         # revs, timestamp, paxOpMode, paxFlags, paxTIARange,adcMin, adcMax, revTime, misAdj, theta, eta, DOP, Ptotal
-        return self.query("SENS:DATA:PRIM:LAT?")
+        self._check_stream_error()
+        if self._stream_thread is not None and self._latest_raw is not None:
+            return self._latest_raw
+        return self._query_raw("SENS:DATA:PRIM:LAT?").decode('ascii')
+
+    def get_latest_primary_measurement_np(self):
+        """
+        Get the latest completed primary measurement data set as numbers.
+
+        :return: The 13 values in the order of PrimaryMeasurement.
+        :rtype: numpy.ndarray
+        """
+        import numpy as np
+        self._check_stream_error()
+        if self._stream_thread is not None and self._ring:
+            return self._ring[-1]
+        return np.fromstring(self._query_raw("SENS:DATA:PRIM:LAT?").decode('ascii'), sep=',')
+
+    @staticmethod
+    def as_record(values):
+        """
+        Label the values of a primary measurement data set.
+
+        :param values: The 13 values returned by get_latest_primary_measurement_np or get_latest.
+        :type values: numpy.ndarray
+        :return: The values as named fields.
+        :rtype: PrimaryMeasurement
+        """
+        return PrimaryMeasurement(*values.tolist())
+
+    def start_streaming(self, rate_hz=200, maxlen=1000):
+        """
+        Start polling the primary measurement data on a background thread.
+
+        While streaming, get_latest_primary_measurement_data returns the most recent data set without
+        querying the instrument. Other commands can still be used and are interleaved with the polling.
+
+        :param rate_hz: Polling rate in Hz.
+        :type rate_hz: float
+        :param maxlen: Number of recent data sets kept for get_batch.
+        :type maxlen: int
+        """
+        if self._stream_thread is not None:
+            return
+        self._ring = deque(maxlen=maxlen)
+        self._latest_raw = None
+        self._stream_error = None
+        self._stream_stop.clear()
+        self._stream_thread = threading.Thread(target=self._poll_loop, args=(1.0 / rate_hz,), daemon=True)
+        self._stream_thread.start()
+
+    def stop_streaming(self):
+        """
+        Stop the background polling started by start_streaming.
+        """
+        if self._stream_thread is None:
+            return
+        self._stream_stop.set()
+        self._stream_thread.join()
+        self._stream_thread = None
+
+    def get_latest(self):
+        """
+        Get the most recent data set collected by start_streaming.
+
+        :return: The 13 primary measurement values, or None if nothing has been received yet.
+        :rtype: numpy.ndarray
+        :raises Exception: The error that stopped the streaming thread, if any.
+        """
+        self._check_stream_error()
+        try:
+            return self._ring[-1]
+        except IndexError:
+            return None
+
+    def get_batch(self, n):
+        """
+        Get the last n data sets collected by start_streaming, oldest first.
+
+        :param n: Number of data sets.
+        :type n: int
+        :return: Array with one row of 13 values per data set.
+        :rtype: numpy.ndarray
+        :raises Exception: The error that stopped the streaming thread, if any.
+        """
+        import numpy as np
+        self._check_stream_error()
+        samples = list(self._ring)[-n:]
+        if not samples:
+            return np.empty((0, 13))
+        return np.stack(samples)
+
+    def _poll_loop(self, period):
+        """
+        Query the primary measurement data every period seconds until stop_streaming is called.
+        """
+        # numpy is imported by the methods that need it, so the driver loads without it
+        try:
+            import numpy as np
+        except ImportError as e:
+            self._stream_error = e
+            return
+        next_time = time.monotonic()
+        while not self._stream_stop.is_set():
+            try:
+                raw = self._query_raw("SENS:DATA:PRIM:LAT?").decode('ascii')
+                self._ring.append(np.fromstring(raw, sep=','))
+            except Exception as e:
+                # Stop polling and let the getters report the error instead of returning stale data
+                self._stream_error = e
+                break
+            self._latest_raw = raw
+            next_time += period
+            delay = next_time - time.monotonic()
+            if delay > 0:
+                self._stream_stop.wait(delay)
+            else:
+                next_time = time.monotonic()
+
+    def _check_stream_error(self):
+        """
+        Raise the error that stopped the streaming thread, if there was one.
+        """
+        if self._stream_error is not None:
+            raise self._stream_error
 
     def get_calibration_string(self):
         """
@@ -216,7 +475,9 @@ class TLPAX:
         :return: The device's calibration string.
         :rtype: str
         """
-        return self.query("CAL:STR?")
+        if "CAL:STR?" not in self._cache:
+            self._cache["CAL:STR?"] = self.query("CAL:STR?")
+        return self._cache["CAL:STR?"]
 
     def set_waveplate_rotation_state(self, state):
         """
@@ -261,4 +522,44 @@ class TLPAX:
         :return: The maximum waveplate rotation velocity limits.
         :rtype: str
         """
-        return self.query("INP:ROT:VEL:LIM?")
\ No newline at end of file
+        return self.query("INP:ROT:VEL:LIM?")
+
+
+class AsyncTLPAX:
+    """
+    asyncio wrapper around TLPAX. pyvisa calls block, so every TLPAX method is run on a
+    worker thread owned by this instance and awaited, e.g. ``await pax.get_wavelength()``.
+    """
+    def __init__(self, resource_name, rm=None):
+        """
+        Initialize the AsyncTLPAX object.
+
+        :param resource_name: The VISA resource name for the PAX1000 polarimeter.
+        :type resource_name: str
+        :param rm: ResourceManager to open the instrument with, see TLPAX.
+        :type rm: pyvisa.ResourceManager, optional
+        """
+        self.device = TLPAX(resource_name, rm)
+        # A single worker keeps the calls to one instrument in order
+        self._executor = ThreadPoolExecutor(max_workers=1)
+
+    def __getattr__(self, name):
+        """
+        Return an awaitable version of the TLPAX method with the given name.
+        """
+        method = getattr(self.device, name)
+        if not callable(method):
+            return method
+
+        async def call(*args, **kwargs):
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, functools.partial(method, *args, **kwargs))
+        return call
+
+    async def close(self):
+        """
+        Close the connection to the instrument and stop the worker thread.
+        """
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self._executor, self.device.close)
+        self._executor.shutdown()
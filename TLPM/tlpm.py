@@ -1,10 +1,18 @@
 import ctypes
-from typing import List, Any, Tuple
+from typing import TYPE_CHECKING, List, Any, Tuple
+
+if TYPE_CHECKING:
+    import numpy
+
+try:
+    import cffi
+except ImportError:
+    cffi = None
 
 # Define the ctypes for the required data types
 ViStatus = ctypes.c_long
 ViRsrc = ctypes.c_char_p
-ViBoolean = ctypes.c_bool
+ViBoolean = ctypes.c_uint16  # unsigned short in visatype.h
 ViSession = ctypes.c_long
 ViPSession = ctypes.POINTER(ctypes.c_long)
 ViPUInt32 = ctypes.POINTER(ctypes.c_uint32)
@@ -20,21 +28,52 @@ ViUInt16 = ctypes.c_uint16
 
 
 class DLLWrapper:
+    # Driver function that describes a status code, set by each driver class
+    _error_message_function = None
+
     def __init__(self, dll_path: str):
         self._dll = ctypes.CDLL(dll_path)
+        self._bindings = {}
 
     def _bind_functions(self, function_bindings: List[Tuple[str, List[Any], Any]]) -> None:
+        # Only record the signatures, each function is bound by __getattr__ on first use
         for name, argtypes, restype in function_bindings:
-            self._bind_function(name, argtypes, restype)
+            self._bindings[name] = (argtypes, restype)
+
+    def __getattr__(self, attr: str) -> Any:
+        # Only called when attr is not set yet, so a bound _f_<name> costs nothing afterwards
+        binding = self.__dict__.get('_bindings', {}).get(attr[3:]) if attr.startswith('_f_') else None
+        if binding is None:
+            raise AttributeError(attr)
+        self._bind_function(attr[3:], *binding)
+        return self.__dict__[attr]
 
     def _bind_function(self, name: str, argtypes: List[Any], restype: Any) -> None:
         # Bind the function with ctypes
         func = getattr(self._dll, name)
         func.argtypes = argtypes
         func.restype = restype
+        # Kept on the instance so calls skip the attribute lookup on the CDLL
+        setattr(self, '_f_' + name, func)
+        # ctypes passes every status to _errcheck before returning it
+        if name != self._error_message_function:
+            func.errcheck = self._errcheck
+
+    def _errcheck(self, status, func, args):
+        if status < 0:
+            # Functions without a session, such as init, report errors for VI_NULL
+            self._throw_error(args[0] if isinstance(args[0], int) else 0, status)
+        return status
+
+    def _throw_error(self, instrument_handle, status):
+        error_message = self._err_buf
+        getattr(self, '_f_' + self._error_message_function)(instrument_handle, status, error_message)
+        raise NameError(ctypes.string_at(error_message).decode())
 
 
 class TLPM(DLLWrapper):
+    _error_message_function = "TLPM_errorMessage"
+
     def __init__(self, dll_path: str):
         super().__init__(dll_path)
 
@@ -49,6 +88,34 @@ class TLPM(DLLWrapper):
                 ("TLPM_measPower", [ViSession, ViPReal64], ViStatus)
         ]) 
 
+        # Output buffers reused by the query functions
+        self._buf_a = ctypes.create_string_buffer(256)
+        self._buf_b = ctypes.create_string_buffer(256)
+        self._buf_c = ctypes.create_string_buffer(256)
+        self._buf_d = ctypes.create_string_buffer(256)
+        self._err_buf = ctypes.create_string_buffer(512)
+
+        # Identification strings per open handle, they do not change during a session
+        self._id_cache = {}
+
+        # Swapped for the cffi function below when cffi is available. The out value is one scratch
+        # double per instance, so a TLPM instance must not measure from several threads at once.
+        self._meas_power = self._f_TLPM_measPower
+        self._power = ctypes.pointer(ViReal64())
+
+        # Raw function pointer for compiled acquisition loops, e.g. Numba nopython code. The power
+        # argument is the address of a float64 passed as an integer, such as out.ctypes.data + 8 * i.
+        self.meas_power_c = ctypes.CFUNCTYPE(ViStatus, ViSession, ctypes.c_size_t)(("TLPM_measPower", self._dll))
+
+        # With cffi installed, the measurement goes through cffi's cheaper call path instead.
+        # Both bindings take an out pointer that is read back with [0].
+        if cffi is not None:
+            ffi = cffi.FFI()
+            ffi.cdef("long TLPM_measPower(long instr, double *power);")
+            self._ffi_lib = ffi.dlopen(dll_path)
+            self._meas_power = self._ffi_lib.TLPM_measPower
+            self._power = ffi.new("double *")
+
 
     def init(self, resource_name: str, id_query: bool, reset_device: bool) -> int:
         """
@@ -72,12 +139,10 @@ class TLPM(DLLWrapper):
         :raises NameError: If there is an error during initialization.
         """
         instrument_handle = ViSession()
-        status = self._dll.TLPM_init(ViRsrc(resource_name.encode()),
-                                      ViBoolean(id_query),
-                                      ViBoolean(reset_device),
-                                      ctypes.byref(instrument_handle))
-        
-        self.__test_for_error(instrument_handle, status)
+        self._f_TLPM_init(resource_name.encode('ascii'),
+                          id_query,
+                          reset_device,
+                          ctypes.byref(instrument_handle))
         return instrument_handle.value
     
     def close(self, instrument_handle: int) -> None:
@@ -89,8 +154,8 @@ class TLPM(DLLWrapper):
 
         :raises NameError: If there is an error during the close operation.
         """
-        status = self._dll.TLPM_close(ViSession(instrument_handle))
-        self.__test_for_error(ViSession(instrument_handle), status)
+        self._f_TLPM_close(instrument_handle)
+        self._id_cache.pop(instrument_handle, None)
         return None
 
     def identification_query(self, instrument_handle: int) -> Tuple[str, str, str, str]:
@@ -105,27 +170,31 @@ class TLPM(DLLWrapper):
 
         :raises NameError: If there is an error during the identification query operation.
         """
-        manufacturer_name = ctypes.create_string_buffer(256)
-        device_name = ctypes.create_string_buffer(256)
-        serial_number = ctypes.create_string_buffer(256)
-        firmware_revision = ctypes.create_string_buffer(256)
+        ident = self._id_cache.get(instrument_handle)
+        if ident is not None:
+            return ident
+
+        manufacturer_name = self._buf_a
+        device_name = self._buf_b
+        serial_number = self._buf_c
+        firmware_revision = self._buf_d
 
-        status = self._dll.TLPM_identificationQuery(
-            ViSession(instrument_handle),
+        self._f_TLPM_identificationQuery(
+            instrument_handle,
             manufacturer_name,
             device_name,
             serial_number,
             firmware_revision
         )
 
-        self.__test_for_error(ViSession(instrument_handle), status)
-
-        return (
-            manufacturer_name.value.decode(),
-            device_name.value.decode(),
-            serial_number.value.decode(),
-            firmware_revision.value.decode()
+        ident = (
+            ctypes.string_at(manufacturer_name).decode(),
+            ctypes.string_at(device_name).decode(),
+            ctypes.string_at(serial_number).decode(),
+            ctypes.string_at(firmware_revision).decode()
         )
+        self._id_cache[instrument_handle] = ident
+        return ident
 
     def set_avg_time(self, instrument_handle: int, average_time: float) -> None:
         """
@@ -138,8 +207,7 @@ class TLPM(DLLWrapper):
 
         :raises NameError: If there is an error during the set average time operation.
         """
-        status = self._dll.TLPM_setAvgTime(ViSession(instrument_handle), ViReal64(average_time))
-        self.__test_for_error(ViSession(instrument_handle), status)
+        self._f_TLPM_setAvgTime(instrument_handle, average_time)
         return None
 
     def set_wavelength(self, instrument_handle: int, wavelength: float) -> None:
@@ -153,8 +221,7 @@ class TLPM(DLLWrapper):
 
         :raises NameError: If there is an error during the set wavelength operation.
         """
-        status = self._dll.TLPM_setWavelength(ViSession(instrument_handle), ViReal64(wavelength))
-        self.__test_for_error(ViSession(instrument_handle), status)
+        self._f_TLPM_setWavelength(instrument_handle, wavelength)
         return None
 
     def set_power_auto_range(self, instrument_handle: int, power_auto_range_mode: bool) -> None:
@@ -168,8 +235,7 @@ class TLPM(DLLWrapper):
 
         :raises NameError: If there is an error during the set power auto range operation.
         """
-        status = self._dll.TLPM_setPowerAutoRange(ViSession(instrument_handle), ViBoolean(power_auto_range_mode))
-        self.__test_for_error(ViSession(instrument_handle), status)
+        self._f_TLPM_setPowerAutoRange(instrument_handle, power_auto_range_mode)
         return None
 
     def meas_power(self, instrument_handle: int) -> float:
@@ -184,21 +250,58 @@ class TLPM(DLLWrapper):
 
         :raises NameError: If there is an error during the power measurement operation.
         """
-        power = ViReal64()
-        status = self._dll.TLPM_measPower(ViSession(instrument_handle), ctypes.byref(power))
-        self.__test_for_error(ViSession(instrument_handle), status)
-        return power.value
-
-    def __test_for_error(self, instrument_handle, status):
+        power = self._power
+        status = self._meas_power(instrument_handle, power)
         if status < 0:
-            self.__throw_error(instrument_handle, status)
-            
+            self._throw_error(instrument_handle, status)
+        return power[0]
 
-    def __throw_error(self,instrument_handle, status):
-        error_message = ctypes.create_string_buffer(512)
-        if status < 0:
-            self._dll.TLPM_errorMessage(instrument_handle,
-                                         status, 
-                                         error_message)
-            raise NameError(error_message.value.decode())
+    def meas_power_array(self, instrument_handle: int, n: int) -> 'numpy.ndarray':
+        """
+        Obtains n consecutive power readings from the instrument.
+
+        :param instrument_handle: The instrument handle returned by <Initialize> to select the desired instrument driver session.
+        :type instrument_handle: int
+        :param n: The number of readings.
+        :type n: int
+
+        :return: The powers in the selected unit.
+        :rtype: np.ndarray
+
+        :raises NameError: If there is an error during the power measurement operation.
+        """
+        # numpy is imported by the array methods only, the scalar measurements do not need it
+        import numpy as np
+        meas_power = self._meas_power
+        power = self._power
+        powers = np.empty(n, dtype=np.float64)
+        for i in range(n):
+            status = meas_power(instrument_handle, power)
+            if status < 0:
+                self._throw_error(instrument_handle, status)
+            powers[i] = power[0]
+        return powers
+
+    def meas_power_into(self, instrument_handle: int, out: 'numpy.ndarray', index: int) -> None:
+        """
+        Obtains a power reading and lets the driver write it straight into out[index].
+
+        :param instrument_handle: The instrument handle returned by <Initialize> to select the desired instrument driver session.
+        :type instrument_handle: int
+        :param out: A C-contiguous float64 array that receives the reading.
+        :type out: np.ndarray
+        :param index: The element of out to write.
+        :type index: int
 
+        :raises ValueError: If out is not a C-contiguous float64 array.
+        :raises IndexError: If index is outside out.
+        :raises NameError: If there is an error during the power measurement operation.
+        """
+        import numpy as np
+        if out.dtype != np.float64 or not out.flags.c_contiguous:
+            raise ValueError("out must be a C-contiguous float64 array")
+        if not 0 <= index < out.size:
+            raise IndexError("index out of range")
+        status = self.meas_power_c(instrument_handle, out.ctypes.data + 8 * index)
+        if status < 0:
+            self._throw_error(instrument_handle, status)
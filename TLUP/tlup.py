@@ -1,10 +1,15 @@
 import ctypes
 from typing import List, Any, Tuple
 
+try:
+    import cffi
+except ImportError:
+    cffi = None
+
 # Define the ctypes for the required data types
 ViStatus = ctypes.c_long
 ViRsrc = ctypes.c_char_p
-ViBoolean = ctypes.c_int
+ViBoolean = ctypes.c_uint16  # unsigned short in visatype.h
 ViSession = ctypes.c_long
 ViPSession = ctypes.POINTER(ctypes.c_long)
 ViPUInt32 = ctypes.POINTER(ctypes.c_uint32)
@@ -20,21 +25,52 @@ ViUInt16 = ctypes.c_uint16
 
 
 class DLLWrapper:
+    # Driver function that describes a status code, set by each driver class
+    _error_message_function = None
+
     def __init__(self, dll_path: str):
         self._dll = ctypes.CDLL(dll_path)
+        self._bindings = {}
 
     def _bind_functions(self, function_bindings: List[Tuple[str, List[Any], Any]]) -> None:
+        # Only record the signatures, each function is bound by __getattr__ on first use
         for name, argtypes, restype in function_bindings:
-            self._bind_function(name, argtypes, restype)
+            self._bindings[name] = (argtypes, restype)
+
+    def __getattr__(self, attr: str) -> Any:
+        # Only called when attr is not set yet, so a bound _f_<name> costs nothing afterwards
+        binding = self.__dict__.get('_bindings', {}).get(attr[3:]) if attr.startswith('_f_') else None
+        if binding is None:
+            raise AttributeError(attr)
+        self._bind_function(attr[3:], *binding)
+        return self.__dict__[attr]
 
     def _bind_function(self, name: str, argtypes: List[Any], restype: Any) -> None:
         # Bind the function with ctypes
         func = getattr(self._dll, name)
         func.argtypes = argtypes
         func.restype = restype
+        # Kept on the instance so calls skip the attribute lookup on the CDLL
+        setattr(self, '_f_' + name, func)
+        # ctypes passes every status to _errcheck before returning it
+        if name != self._error_message_function:
+            func.errcheck = self._errcheck
+
+    def _errcheck(self, status, func, args):
+        if status < 0:
+            # Functions without a session, such as init, report errors for VI_NULL
+            self._throw_error(args[0] if isinstance(args[0], int) else 0, status)
+        return status
+
+    def _throw_error(self, instrument_handle, status):
+        error_message = self._err_buf
+        getattr(self, '_f_' + self._error_message_function)(instrument_handle, status, error_message)
+        raise NameError(ctypes.string_at(error_message).decode())
 
 
 class TLUP(DLLWrapper):
+    _error_message_function = "TLUP_errorMessage"
+
     def __init__(self, dll_path: str):
         super().__init__(dll_path)
 
@@ -49,6 +85,30 @@ class TLUP(DLLWrapper):
             ("TLUP_setLedCurrentSetpoint", [ViSession, ViReal64],ViStatus),
         ])
 
+        # Output buffers reused by the query functions
+        self._buf_a = ctypes.create_string_buffer(256)
+        self._buf_b = ctypes.create_string_buffer(256)
+        self._buf_c = ctypes.create_string_buffer(256)
+        self._err_buf = ctypes.create_string_buffer(256)
+
+        # Swapped for the cffi function below when cffi is available. The out value is one scratch
+        # double per instance, so a TLUP instance must not measure from several threads at once.
+        self._meas_device_temperature = self._f_TLUP_measDeviceTemperature
+        self._temperature = ctypes.pointer(ViReal64())
+
+        # Raw function pointer for compiled acquisition loops, e.g. Numba nopython code. The temperature
+        # argument is the address of a float64 passed as an integer, such as out.ctypes.data + 8 * i.
+        self.meas_device_temperature_c = ctypes.CFUNCTYPE(ViStatus, ViSession, ctypes.c_size_t)(("TLUP_measDeviceTemperature", self._dll))
+
+        # With cffi installed, the measurement goes through cffi's cheaper call path instead.
+        # Both bindings take an out pointer that is read back with [0].
+        if cffi is not None:
+            ffi = cffi.FFI()
+            ffi.cdef("long TLUP_measDeviceTemperature(long instr, double *temperature);")
+            self._ffi_lib = ffi.dlopen(dll_path)
+            self._meas_device_temperature = self._ffi_lib.TLUP_measDeviceTemperature
+            self._temperature = ffi.new("double *")
+
     def init(self, resource_name: str, id_query: bool, reset_device: bool) -> int:
         """
         Initializes the instrument driver session and performs the following initialization actions:
@@ -70,12 +130,10 @@ class TLUP(DLLWrapper):
         :raises NameError: If there is an error during initialization.
         """
         instrument_handle = ViSession()
-        status = self._dll.TLUP_init(ViRsrc(resource_name.encode()),
-                                      ViBoolean(id_query),
-                                      ViBoolean(reset_device),
-                                      ctypes.byref(instrument_handle))
-
-        self.__test_for_error(instrument_handle, status)
+        self._f_TLUP_init(resource_name.encode('ascii'),
+                          id_query,
+                          reset_device,
+                          ctypes.byref(instrument_handle))
         return instrument_handle.value
     
     def close(self, instrument_handle: int) -> None:
@@ -87,8 +145,7 @@ class TLUP(DLLWrapper):
 
         :raises NameError: If there is an error during the close operation.
         """
-        status = self._dll.TLUP_close(ViSession(instrument_handle))
-        self.__test_for_error(ViSession(instrument_handle), status)
+        self._f_TLUP_close(instrument_handle)
         return None
 
     
@@ -109,10 +166,8 @@ class TLUP(DLLWrapper):
             This information can be retrieved with other functions from the class, e.g. <Get Resource Name> and <Get Resource Information>.
         """
         resource_count = ViUInt32()
-        status = self._dll.TLUP_findRsrc(ViSession(instrument_handle),
-                                         ctypes.byref(resource_count))
-
-        self.__test_for_error(ViSession(instrument_handle), status)
+        self._f_TLUP_findRsrc(instrument_handle,
+                              ctypes.byref(resource_count))
         return resource_count.value
     
     
@@ -133,22 +188,20 @@ class TLUP(DLLWrapper):
         (1) The index is zero-based. The maximum index to be used here is one less than the number of UP devices connected.
             The number of UP devices is available by calling <Find Resource>.
         """
-        model_name = ctypes.create_string_buffer(256)
-        serial_number = ctypes.create_string_buffer(256)
-        manufacturer = ctypes.create_string_buffer(256)
+        model_name = self._buf_a
+        serial_number = self._buf_b
+        manufacturer = self._buf_c
         resource_available = ViBoolean()
 
-        status = self._dll.TLUP_getRsrcInfo(ViSession(instrument_handle),
-                                            ViUInt32(index),
-                                            model_name,
-                                            serial_number,
-                                            manufacturer,
-                                            ctypes.byref(resource_available))
-
-        self.__test_for_error(instrument_handle, status)
-        return (model_name.value.decode(),
-                serial_number.value.decode(),
-                manufacturer.value.decode(),
+        self._f_TLUP_getRsrcInfo(instrument_handle,
+                                 index,
+                                 model_name,
+                                 serial_number,
+                                 manufacturer,
+                                 ctypes.byref(resource_available))
+        return (ctypes.string_at(model_name).decode(),
+                ctypes.string_at(serial_number).decode(),
+                ctypes.string_at(manufacturer).decode(),
                 bool(resource_available.value))
 
 
@@ -167,13 +220,12 @@ class TLUP(DLLWrapper):
         Note:
         This function is used to obtain the device internal temperature.
         """
-        device_temperature = ViReal64()
+        device_temperature = self._temperature
 
-        status = self._dll.TLUP_measDeviceTemperature(ViSession(instrument_handle),
-                                                      ctypes.byref(device_temperature))
-
-        self.__test_for_error(ViSession(instrument_handle), status)
-        return device_temperature.value
+        status = self._meas_device_temperature(instrument_handle, device_temperature)
+        if status < 0:
+            self._throw_error(instrument_handle, status)
+        return device_temperature[0]
     
     def switch_led_output(self, instrument_handle: int, enable_led_output: bool) -> None:
         """
@@ -188,10 +240,8 @@ class TLUP(DLLWrapper):
         Note:
         This function is valid for UP LED.
         """
-        status = self._dll.TLUP_switchLedOutput(ViSession(instrument_handle),
-                                                ViBoolean(enable_led_output))
-
-        self.__test_for_error(ViSession(instrument_handle), status)
+        self._f_TLUP_switchLedOutput(instrument_handle,
+                                     enable_led_output)
         return None
     
 
@@ -209,22 +259,6 @@ class TLUP(DLLWrapper):
         Note:
         (1) This function is valid for UP LED.
         """
-        status = self._dll.TLUP_setLedCurrentSetpoint(ViSession(instrument_handle),
-                                                      ViReal64(led_current_setpoint))
-
-        self.__test_for_error(ViSession(instrument_handle), status)
+        self._f_TLUP_setLedCurrentSetpoint(instrument_handle,
+                                           led_current_setpoint)
         return None
-
-    def __test_for_error(self, instrument_handle, status):
-        if status < 0:
-            self.__throw_error(instrument_handle, status)
-            
-
-    def __throw_error(self,instrument_handle, status):
-        error_message = ctypes.create_string_buffer(256)
-        if status < 0:
-            self._dll.TLUP_errorMessage(instrument_handle,
-                                         status, 
-                                         error_message)
-            raise NameError(error_message.value.decode())
-
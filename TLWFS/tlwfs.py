@@ -1,10 +1,11 @@
 import ctypes
+import numpy as np
 from typing import List, Any, Tuple
 
 # Define the ctypes for the required data types
 ViStatus = ctypes.c_long
 ViRsrc = ctypes.c_char_p
-ViBoolean = ctypes.c_int
+ViBoolean = ctypes.c_uint16  # unsigned short in visatype.h
 ViSession = ctypes.c_long
 ViPSession = ctypes.POINTER(ctypes.c_long)
 ViPUInt32 = ctypes.POINTER(ctypes.c_uint32)
@@ -18,23 +19,74 @@ ViPInt32 = ctypes.POINTER(ctypes.c_int32)
 ViReal32 = ctypes.c_float
 
 
+def aligned_empty(shape: Tuple[int, ...], dtype: Any = np.uint8, align: int = 64) -> np.ndarray:
+    """
+    Returns an uninitialized C-contiguous array whose data starts on an align-byte boundary.
+
+    :param shape: The shape of the array.
+    :type shape: Tuple[int, ...]
+    :param dtype: The element type of the array.
+    :type dtype: Any
+    :param align: The alignment of the first element in bytes.
+    :type align: int
+
+    :return: The aligned array.
+    :rtype: np.ndarray
+    """
+    nbytes = int(np.prod(shape)) * np.dtype(dtype).itemsize
+    raw = np.empty(nbytes + align, dtype=np.uint8)
+    offset = -raw.ctypes.data % align
+    return raw[offset:offset + nbytes].view(dtype).reshape(shape)
+
+
 
 class DLLWrapper:
+    # Driver function that describes a status code, set by each driver class
+    _error_message_function = None
+
     def __init__(self, dll_path: str):
         self._dll = ctypes.CDLL(dll_path)
+        self._bindings = {}
 
     def _bind_functions(self, function_bindings: List[Tuple[str, List[Any], Any]]) -> None:
+        # Only record the signatures, each function is bound by __getattr__ on first use
         for name, argtypes, restype in function_bindings:
-            self._bind_function(name, argtypes, restype)
+            self._bindings[name] = (argtypes, restype)
+
+    def __getattr__(self, attr: str) -> Any:
+        # Only called when attr is not set yet, so a bound _f_<name> costs nothing afterwards
+        binding = self.__dict__.get('_bindings', {}).get(attr[3:]) if attr.startswith('_f_') else None
+        if binding is None:
+            raise AttributeError(attr)
+        self._bind_function(attr[3:], *binding)
+        return self.__dict__[attr]
 
     def _bind_function(self, name: str, argtypes: List[Any], restype: Any) -> None:
         # Bind the function with ctypes
         func = getattr(self._dll, name)
         func.argtypes = argtypes
         func.restype = restype
+        # Kept on the instance so calls skip the attribute lookup on the CDLL
+        setattr(self, '_f_' + name, func)
+        # ctypes passes every status to _errcheck before returning it
+        if name != self._error_message_function:
+            func.errcheck = self._errcheck
+
+    def _errcheck(self, status, func, args):
+        if status < 0:
+            # Functions without a session, such as init, report errors for VI_NULL
+            self._throw_error(args[0] if isinstance(args[0], int) else 0, status)
+        return status
+
+    def _throw_error(self, instrument_handle, status):
+        error_message = self._err_buf
+        getattr(self, '_f_' + self._error_message_function)(instrument_handle, status, error_message)
+        raise NameError(ctypes.string_at(error_message).decode())
 
 
 class TLWFS(DLLWrapper):
+    _error_message_function = "WFS_errorMessage"
+
     def __init__(self, dll_path: str):
         super().__init__(dll_path)
 
@@ -44,8 +96,18 @@ class TLWFS(DLLWrapper):
                 ("WFS_errorMessage", [ViSession, ViStatus, ctypes.POINTER(ViChar)], ViStatus),
                 ("WFS_GetInstrumentInfo", [ViSession, ctypes.POINTER(ViChar), ctypes.POINTER(ViChar), ctypes.POINTER(ViChar), ctypes.POINTER(ViChar)], ViStatus),
                 ("WFS_TakeSpotfieldImage", [ViSession], ViStatus), 
-                ("WFS_GetSpotfieldImage", [ViSession, ctypes.POINTER(ctypes.c_uint8), ViPInt32, ViPInt32], ViStatus), 
+                ("WFS_GetSpotfieldImage", [ViSession, ctypes.POINTER(ctypes.POINTER(ctypes.c_uint8)), ViPInt32, ViPInt32], ViStatus), 
          ])
+
+        # Output buffers reused by the query functions
+        self._buf_a = ctypes.create_string_buffer(256)
+        self._buf_b = ctypes.create_string_buffer(256)
+        self._buf_c = ctypes.create_string_buffer(256)
+        self._buf_d = ctypes.create_string_buffer(256)
+        self._err_buf = ctypes.create_string_buffer(256)
+
+        # Identification strings per open handle, they do not change during a session
+        self._id_cache = {}
     
     def init(self, resource_name: str, id_query: bool, reset_device: bool) -> int:
         """
@@ -69,12 +131,10 @@ class TLWFS(DLLWrapper):
         :raises NameError: If there is an error during initialization.
         """
         instrument_handle = ViSession()
-        status = self._dll.WFS_init(ViRsrc(resource_name.encode()),
-                                      ViBoolean(id_query),
-                                      ViBoolean(reset_device),
-                                      ctypes.byref(instrument_handle))
-        
-        self.__test_for_error(instrument_handle, status)
+        self._f_WFS_init(resource_name.encode('ascii'),
+                         id_query,
+                         reset_device,
+                         ctypes.byref(instrument_handle))
         return instrument_handle.value
     
     def close(self, instrument_handle: int) -> None:
@@ -86,8 +146,8 @@ class TLWFS(DLLWrapper):
 
         :raises NameError: If there is an error during the close operation.
         """
-        status = self._dll.WFS_close(ViSession(instrument_handle))
-        self.__test_for_error(ViSession(instrument_handle), status)
+        self._f_WFS_close(instrument_handle)
+        self._id_cache.pop(instrument_handle, None)
         return None
     
     def identification_query(self, instrument_handle: int) -> Tuple[str, str, str, str]:
@@ -102,27 +162,31 @@ class TLWFS(DLLWrapper):
 
         :raises NameError: If there is an error during the identification query operation.
         """
-        manufacturer_name = ctypes.create_string_buffer(256)
-        device_name = ctypes.create_string_buffer(256)
-        serial_number = ctypes.create_string_buffer(256)
-        serial_number_cam = ctypes.create_string_buffer(256)
+        ident = self._id_cache.get(instrument_handle)
+        if ident is not None:
+            return ident
 
-        status = self._dll.WFS_GetInstrumentInfo(
-            ViSession(instrument_handle),
+        manufacturer_name = self._buf_a
+        device_name = self._buf_b
+        serial_number = self._buf_c
+        serial_number_cam = self._buf_d
+
+        self._f_WFS_GetInstrumentInfo(
+            instrument_handle,
             manufacturer_name,
             device_name,
             serial_number,
             serial_number_cam
         )
 
-        self.__test_for_error(ViSession(instrument_handle), status)
-
-        return (
-            manufacturer_name.value.decode(),
-            device_name.value.decode(),
-            serial_number.value.decode(),
-            serial_number_cam.value.decode()
+        ident = (
+            ctypes.string_at(manufacturer_name).decode(),
+            ctypes.string_at(device_name).decode(),
+            ctypes.string_at(serial_number).decode(),
+            ctypes.string_at(serial_number_cam).decode()
         )
+        self._id_cache[instrument_handle] = ident
+        return ident
 
     def take_spotfield_image(self, instrument_handle: int) -> None:
         """
@@ -133,18 +197,22 @@ class TLWFS(DLLWrapper):
 
         :raises NameError: If there is an error during the take spotfield image operation.
         """
-        status = self._dll.WFS_TakeSpotfieldImage(ViSession(instrument_handle))
-        self.__test_for_error(ViSession(instrument_handle), status)
+        self._f_WFS_TakeSpotfieldImage(instrument_handle)
 
-    def get_spotfield_image(self, instrument_handle: int) -> Tuple[bytes, int, int]:
+    def get_spotfield_image(self, instrument_handle: int, copy: bool = False) -> Tuple[np.ndarray, int, int]:
         """
         Returns the reference to a spotfield image taken by functions TakeSpotfieldImage() or TakeSpotfieldImageAutoExpos() and the image size.
 
+        Unless copy is True, the returned array is a read-only view of the driver buffer. It is not copied,
+        and its contents are replaced by the next take_spotfield_image call.
+
         :param instrument_handle: The instrument handle returned by <Initialize> to select the desired instrument driver session.
         :type instrument_handle: int
+        :param copy: Return an array that owns a copy of the image instead of a view of the driver buffer.
+        :type copy: bool
 
-        :return: A tuple containing the reference to the image buffer, the image height (rows) in pixels, and the image width (columns) in pixels.
-        :rtype: Tuple[bytes, int, int]
+        :return: A tuple containing the image as a (rows, columns) uint8 array, the image height (rows) in pixels, and the image width (columns) in pixels.
+        :rtype: Tuple[np.ndarray, int, int]
 
         :raises NameError: If there is an error during the get spotfield image operation.
         """
@@ -152,36 +220,101 @@ class TLWFS(DLLWrapper):
         rows = ViInt32()
         columns = ViInt32()
 
-        status = self._dll.WFS_GetSpotfieldImage(
-            ViSession(instrument_handle),
+        self._f_WFS_GetSpotfieldImage(
+            instrument_handle,
             ctypes.byref(image_buf),
             ctypes.byref(rows),
             ctypes.byref(columns),
         )
 
-        self.__test_for_error(ViSession(instrument_handle), status)
-
-        # Convert the image buffer to bytes.
-        buffer_size = rows.value * columns.value
-        image_data = bytes(ctypes.cast(image_buf, ctypes.POINTER(ctypes.c_uint8 * buffer_size)).contents)
+        image_data = np.ctypeslib.as_array(image_buf, shape=(rows.value, columns.value))
+        if copy:
+            image_data = image_data.copy()
+        else:
+            image_data.setflags(write=False)
 
         return image_data, rows.value, columns.value
 
-    
-    def __test_for_error(self, instrument_handle, status):
-        if status < 0:
-            self.__throw_error(instrument_handle, status)
-            
+    def get_spotfield_image_memoryview(self, instrument_handle: int) -> Tuple[memoryview, int, int]:
+        """
+        Returns the spotfield image as a read-only memoryview of the driver buffer, for consumers that do not use NumPy.
 
-    def __throw_error(self,instrument_handle, status):
-        error_message = ctypes.create_string_buffer(256)
-        if status < 0:
-            self._dll.WFS_error_message(instrument_handle,
-                                         status, 
-                                         error_message)
-            raise NameError(error_message.value.decode())
+        Nothing is copied, so the contents are replaced by the next take_spotfield_image call.
+
+        :param instrument_handle: The instrument handle returned by <Initialize> to select the desired instrument driver session.
+        :type instrument_handle: int
+
+        :return: A tuple containing the row-major image bytes, the image height (rows) in pixels, and the image width (columns) in pixels.
+        :rtype: Tuple[memoryview, int, int]
+
+        :raises NameError: If there is an error during the get spotfield image operation.
+        """
+        image_buf = ctypes.POINTER(ctypes.c_uint8)()
+        rows = ViInt32()
+        columns = ViInt32()
 
+        self._f_WFS_GetSpotfieldImage(
+            instrument_handle,
+            ctypes.byref(image_buf),
+            ctypes.byref(rows),
+            ctypes.byref(columns),
+        )
 
+        image_array = (ctypes.c_uint8 * (rows.value * columns.value)).from_address(ctypes.addressof(image_buf.contents))
+        return memoryview(image_array).toreadonly(), rows.value, columns.value
 
+    def acquire_into(self, instrument_handle: int, dst: np.ndarray) -> None:
+        """
+        Takes a spotfield image and copies it into a caller-owned array with a single memmove.
 
+        Combined with aligned_empty, the frame lands in an aligned buffer that stays valid across acquisitions.
 
+        :param instrument_handle: The instrument handle returned by <Initialize> to select the desired instrument driver session.
+        :type instrument_handle: int
+        :param dst: A C-contiguous uint8 array of shape (rows, columns).
+        :type dst: np.ndarray
+
+        :raises ValueError: If dst is not a C-contiguous uint8 array of the image size.
+        :raises NameError: If there is an error during the take or get spotfield image operation.
+        """
+        image_buf = ctypes.POINTER(ctypes.c_uint8)()
+        rows = ViInt32()
+        columns = ViInt32()
+
+        self._f_WFS_TakeSpotfieldImage(instrument_handle)
+        self._f_WFS_GetSpotfieldImage(
+            instrument_handle,
+            ctypes.byref(image_buf),
+            ctypes.byref(rows),
+            ctypes.byref(columns),
+        )
+
+        if dst.dtype != np.uint8 or not dst.flags.c_contiguous or dst.shape != (rows.value, columns.value):
+            raise ValueError(f"dst must be a C-contiguous uint8 array of shape ({rows.value}, {columns.value})")
+        ctypes.memmove(dst.ctypes.data, image_buf, dst.nbytes)
+
+    def get_spotfield_image_f32(self, instrument_handle: int, normalize: bool = True,
+                                background: np.ndarray = None) -> np.ndarray:
+        """
+        Returns the current spotfield image converted to float32, ready for centroiding.
+
+        The conversion runs as a single vectorized NumPy ufunc straight from the driver buffer.
+
+        :param instrument_handle: The instrument handle returned by <Initialize> to select the desired instrument driver session.
+        :type instrument_handle: int
+        :param normalize: Scale the pixel values from 0..255 to 0..1.
+        :type normalize: bool
+        :param background: Optional background frame of the same shape, in the same scale as the output, subtracted in place.
+        :type background: np.ndarray
+
+        :return: The image as a (rows, columns) float32 array.
+        :rtype: np.ndarray
+
+        :raises NameError: If there is an error during the get spotfield image operation.
+        """
+        raw, _, _ = self.get_spotfield_image(instrument_handle)
+        scale = np.float32(1.0 / 255.0) if normalize else np.float32(1.0)
+        image = np.multiply(raw, scale, dtype=np.float32)
+        if background is not None:
+            np.subtract(image, background, out=image, casting='unsafe')
+        return image
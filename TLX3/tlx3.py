@@ -1,90 +1,279 @@
+import os
+import select
 import serial
+import sys
 import time
 
-SUPPORTED_SWEEP_SPEEDS = [50, 60, 80, 100, 120, 150, 160, 200, 300, 400]
+
+def _set_low_latency(ser):
+    if not sys.platform.startswith('linux'):
+        return
+    try:
+        import fcntl
+        import struct
+        TIOCGSERIAL = 0x541E
+        TIOCSSERIAL = 0x541F
+        ASYNC_LOW_LATENCY = 0x2000
+        buf = bytearray(0x60)
+        fcntl.ioctl(ser.fileno(), TIOCGSERIAL, buf)
+        flags = struct.unpack_from('i', buf, 4)[0] | ASYNC_LOW_LATENCY
+        struct.pack_into('i', buf, 4, flags)
+        fcntl.ioctl(ser.fileno(), TIOCSSERIAL, buf)
+    except (OSError, ImportError):
+        pass
+    tty = os.path.basename(os.path.realpath(ser.port))
+    try:
+        with open(f"/sys/bus/usb-serial/devices/{tty}/latency_timer", 'w') as f:
+            f.write('1')
+    except OSError:
+        # Not an FTDI adapter, or no permission to change it
+        pass
+
+
+# Fixed commands, already terminated and encoded
+_CMD_LASER_STATUS = b"LASer:STATus?\r"
+_CMD_LASER_POWER = b"LASer:POWer?\r"
+_CMD_MAXIMUM_WAVELENGTH = b"LASer:RANGE:MAX?\r"
+_CMD_MINIMUM_WAVELENGTH = b"LASer:RANGE:MIN?\r"
+_CMD_LASER_SWEEP_STATUS = b"LASer:SWeep:STATus?\r"
+_CMD_STOP_SWEEP = b"LASer:SWeep:STOP\r"
+_CMD_WAVELENGTH = b"LASer:WAVElength?\r"
+_CMD_BOOTLOADER_VERSION = b"SYS:BVER?\r"
+_CMD_APPLICATION_VERSION = b"SYS:AVER?\r"
+_CMD_LASER_VERSION = b"SYS:LVER?\r"
+_CMD_PART_NAME = b"SYS:PARTNAME?\r"
+_CMD_PRODUCT_NAME = b"SYS:PRODNAME?\r"
+_CMD_SERIAL_NUMBER = b"SYS:SERNUM?\r"
+
+# Default reply of LASer:SWeep:STATus? while no sweep is running. This value is assumed, not taken
+# from the TLX3 documentation, so pass the reply of your firmware as sweep_idle_status if it differs.
+SWEEP_STATUS_IDLE = "0"
+# Extra time in seconds scan_wavelengths allows a stepped sweep beyond its expected duration
+SWEEP_TIMEOUT_MARGIN = 5.0
+
+SUPPORTED_SWEEP_SPEEDS = frozenset([50, 60, 80, 100, 120, 150, 160, 200, 300, 400])
+
+# Accepted argument ranges, membership in a range is a constant time check for ints
+_OFFSET_RANGE = range(-10000, 10001)
+_STEP_SIZE_RANGE = range(1, 10001)
+_SWEEP_COUNT_RANGE = range(0, 65536)
+
+
+def _validate_sweep(sweep_count, speed=None, step_size=None):
+    # Checks shared by the continuous and the stepped sweep
+    if sweep_count not in _SWEEP_COUNT_RANGE:
+        raise ValueError(f"sweep_count must be between 0 and 65535, got {sweep_count}")
+    if speed is not None and speed not in SUPPORTED_SWEEP_SPEEDS:
+        raise ValueError(f"speed must be one of {sorted(SUPPORTED_SWEEP_SPEEDS)}, got {speed}")
+    if step_size is not None and step_size not in _STEP_SIZE_RANGE:
+        raise ValueError(f"step_size must be between 1 and 10000 pm, got {step_size}")
+
+
+def _as_int(name, value):
+    # Converts an int, a float without fractional part or a str holding an int, where the
+    # commands need an int. Anything else raises ValueError instead of being truncated.
+    try:
+        number = int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{name} must be an integer, got {value!r}") from None
+    if not isinstance(value, str) and number != value:
+        raise ValueError(f"{name} must be an integer, got {value!r}")
+    return number
+
+
+def _arithmetic_runs(wavelengths):
+    # Splits wavelengths into (start, stop, step) runs a stepped sweep can cover. Points that do not
+    # continue a run with a valid step come out as single point runs with step 0.
+    runs = []
+    i = 0
+    while i < len(wavelengths):
+        j = i + 1
+        step = wavelengths[j] - wavelengths[i] if j < len(wavelengths) else 0
+        if step in _STEP_SIZE_RANGE:
+            while j + 1 < len(wavelengths) and wavelengths[j + 1] - wavelengths[j] == step:
+                j += 1
+            runs.append((wavelengths[i], wavelengths[j], step))
+            i = j + 1
+        else:
+            runs.append((wavelengths[i], wavelengths[i], 0))
+            i += 1
+    return runs
+
+
+def _terminated(command):
+    # Encoded command ending in \r, for commands given without the terminator or as str
+    if isinstance(command, str):
+        command = command.strip().encode()
+    return command if command.endswith(b'\r') else command + b'\r'
+
 
 class TLX3:
-    def __init__(self, com_port):
+    # low_latency asks a Linux USB-serial driver to hand over each reply at once instead of
+    # after its 16 ms latency timer, pass False to leave the port settings untouched.
+    # sweep_idle_status is the sweep status reply scan_wavelengths waits for, see SWEEP_STATUS_IDLE.
+    def __init__(self, com_port, low_latency=True, sweep_idle_status=SWEEP_STATUS_IDLE):
         self.com_port = com_port
+        self.low_latency = low_latency
+        self.sweep_idle_status = sweep_idle_status
         self.connection = None
+        self._fd = None
+        # Bytes read past the end of the last reply
+        self._rx = bytearray()
+        # Sweep reports set aside before queries, returned by get_sweep_report
+        self._reports = []
+        # Replies to queries whose answer is fixed by the hardware, see _query_fixed
+        self._fixed_cache = {}
 
     def connect(self):
-        try:
-            self.connection = serial.Serial(
-                port=self.com_port,
-                baudrate=115200,
-                bytesize=8,
-                parity='N',
-                stopbits=1,
-                timeout=1,
-                xonxoff=False,
-                rtscts=False,
-                dsrdtr=False
-            )
-            print(f"Connected to TLX3 at {self.com_port}")
-        except Exception as e:
-            print(f"Error connecting to TLX3: {str(e)}")
+        # serial.SerialException reaches the caller when the port cannot be opened
+        self.connection = serial.Serial(
+            port=self.com_port,
+            baudrate=115200,
+            bytesize=8,
+            parity='N',
+            stopbits=1,
+            timeout=1,
+            xonxoff=False,
+            rtscts=False,
+            dsrdtr=False
+        )
+        if self.low_latency:
+            _set_low_latency(self.connection)
+        self._fd = self.connection.fileno() if os.name == 'posix' else None
+        self._rx.clear()
+        self._reports.clear()
+        self._fixed_cache.clear()
+        print(f"Connected to TLX3 at {self.com_port}")
 
     def disconnect(self):
         if self.connection:
             self.connection.close()
             self.connection = None
+            self._fd = None
             print(f"Disconnected from TLX3 at {self.com_port}")
 
     def send_command(self, command):
+        # command is bytes, written as is when it already ends in \r. A str is stripped and encoded first.
+        return self._send_raw(command if command[-1:] == b'\r' else _terminated(command))
+
+    def send_text(self, command):
+        # Convenience for interactive use, strips and terminates a str command
+        return self._send_raw((command.strip() + '\r').encode())
+
+    def _send_raw(self, command):
+        # command is the encoded command including its \r terminator
         if not self.connection:
-            print("Error: Not connected to TLX3.")
-            return
+            raise RuntimeError("Not connected to TLX3.")
 
-        command = command.strip() + '\r'
-        self.connection.write(command.encode())
-        time.sleep(0.1)
-        response = self.connection.readline().decode().strip()
+        self.connection.write(command)
+        response = self._read_reply().decode().strip()
         return response
 
+    def _query_fixed(self, command):
+        # Serial number, versions and wavelength range do not change while connected, so they are
+        # asked once. An empty reply from a timeout is not kept.
+        response = self._fixed_cache.get(command)
+        if response is None:
+            response = self._send_raw(command)
+            if response:
+                self._fixed_cache[command] = response
+        return response
+
+    def cache_clear(self):
+        # Forget the cached serial number, versions and wavelength range
+        self._fixed_cache.clear()
+
+    def _read_reply(self):
+        # Returns as soon as the \r terminated reply is in, the port timeout only bounds a missing reply.
+        # On POSIX this waits in select and takes whatever arrived with one os.read, where pyserial's
+        # read_until would do a select and a read for every single byte.
+        if self._fd is None:
+            return self.connection.read_until(b'\r')
+        rx = self._rx
+        deadline = None
+        while True:
+            end = rx.find(b'\r')
+            if end >= 0:
+                reply = bytes(rx[:end + 1])
+                del rx[:end + 1]
+                return reply
+            if deadline is None and self.connection.timeout is not None:
+                deadline = time.monotonic() + self.connection.timeout
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0 or not select.select([self._fd], [], [], remaining)[0]:
+                # Timed out, hand back the partial reply like read_until does
+                reply = bytes(rx)
+                rx.clear()
+                return reply
+            try:
+                data = os.read(self._fd, 4096)
+            except BlockingIOError:
+                continue
+            if not data:
+                raise serial.SerialException("device reports readiness to read but returned no data")
+            rx += data
+
+    def send_commands(self, commands):
+        # Writes all commands at once and then reads one reply per command, so the
+        # batch costs a single round trip instead of one per command
+        if not self.connection:
+            raise RuntimeError("Not connected to TLX3.")
+
+        # A line already received would shift every response of the batch. It is a sweep report or a
+        # stale reply, so complete lines are kept for get_sweep_report and an unfinished one is dropped.
+        self._stash_reports()
+        self._rx.clear()
+        self.connection.write(b''.join(command if command[-1:] == b'\r' else _terminated(command) for command in commands))
+        return [self._read_reply().decode().strip() for _ in commands]
+
+    def get_status_snapshot(self):
+        status, power, wavelength, sweep_status = self.send_commands(
+            [_CMD_LASER_STATUS, _CMD_LASER_POWER, _CMD_WAVELENGTH, _CMD_LASER_SWEEP_STATUS])
+        return {"status": status, "power": power, "wavelength": wavelength, "sweep_status": sweep_status}
+
     def set_laser_on(self,value):
-        response = self.send_command(f"LASer:ON: {value}")
+        # value is 0 or 1, given as an int or a str such as "1"
+        response = self._send_raw(b"LASer:ON: %d\r" % _as_int("value", value))
         return response
 
     def get_laser_status(self):
-        response = self.send_command("LASer:STATus?")
+        response = self._send_raw(_CMD_LASER_STATUS)
         return response
 
     def get_laser_power(self):
-        response = self.send_command("LASer:POWer?")
+        response = self._send_raw(_CMD_LASER_POWER)
         return response
     
     def get_maximum_wavelength(self):
-        response = self.send_command("LASer:RANGE:MAX?")
+        response = self._query_fixed(_CMD_MAXIMUM_WAVELENGTH)
         return response
     
     def get_minimum_wavelength(self):
-        response = self.send_command("LASer:RANGE:MIN?")
+        response = self._query_fixed(_CMD_MINIMUM_WAVELENGTH)
         return response
     
     def set_wavelength_offset(self,offset):
         # step is in pm
-        assert type(offset) == int
-        assert offset >=-10000 and offset <= 10000
+        if not isinstance(offset, int) or offset not in _OFFSET_RANGE:
+            raise ValueError(f"offset must be an int between -10000 and 10000 pm, got {offset}")
 
-        response = self.send_command(f"LASer:STep: {offset}")
+        response = self._send_raw(b"LASer:STep: %d\r" % offset)
         return response
     
     def set_continuous_laser_sweep(self, start_wavelegth, stop_wavelength, sweep_count, speed):
         # sweep_count is in number of steps: 0  is infinite sweeps
         # step is in pm
-        assert sweep_count>=0 and sweep_count<=65535
-        assert speed in SUPPORTED_SWEEP_SPEEDS
+        _validate_sweep(sweep_count, speed=speed)
 
-        response = self.send_command(f"LASer:SWeep:Cont: {start_wavelegth},{stop_wavelength},{sweep_count},{speed}")
+        response = self._send_raw(b"LASer:SWeep:Cont: %d,%d,%d,%d\r" % (start_wavelegth, stop_wavelength, sweep_count, speed))
         return response
     
     def set_laser_sweep_reporting(self, enable_reporting):
-        response = self.send_command(f"LASer:SWeep:Report: {1 if enable_reporting else 0}")
+        response = self._send_raw(b"LASer:SWeep:Report: %d\r" % bool(enable_reporting))
         return response
 
     def get_laser_sweep_status(self):
-        response = self.send_command("LASer:SWeep:STATus?")
+        response = self._send_raw(_CMD_LASER_SWEEP_STATUS)
         return response
     
     def set_stepped_laser_sweep(self, start_wavelegth, stop_wavelength, step_size,sweep_count, dwell_time):
@@ -92,46 +281,107 @@ class TLX3:
         # step is in pm
         # sweep_count is in number of steps: 0  is infinite sweeps
         # dwell_time is in ms
-        assert step_size>=1 and step_size<=10000
-        assert sweep_count>=0 and sweep_count<=65535
+        _validate_sweep(sweep_count, step_size=step_size)
 
-        response = self.send_command(f"LASer:SWeep:STEPped: {start_wavelegth},{stop_wavelength},{step_size},{sweep_count},{dwell_time}")
+        response = self._send_raw(b"LASer:SWeep:STEPped: %d,%d,%d,%d,%d\r" % (start_wavelegth, stop_wavelength, step_size, sweep_count, dwell_time))
         return response
 
+    def scan_wavelengths(self, wavelengths, dwell_time, poll_interval=0.1, timeout_margin=SWEEP_TIMEOUT_MARGIN):
+        # Visits each wavelength (pm) for dwell_time ms and returns when done. Evenly spaced
+        # wavelengths run as one stepped sweep on the laser instead of a command per point,
+        # other sequences are split into as few stepped sweeps as possible. Raises TimeoutError
+        # if a sweep is still running timeout_margin seconds after its expected end.
+        wavelengths = [int(wavelength) for wavelength in wavelengths]
+        for start, stop, step in _arithmetic_runs(wavelengths):
+            if step == 0:
+                self.set_wavelength(start)
+                time.sleep(dwell_time / 1000)
+                continue
+            duration = ((stop - start) // step + 1) * dwell_time / 1000
+            deadline = time.monotonic() + duration + timeout_margin
+            self.set_stepped_laser_sweep(start, stop, step, 1, dwell_time)
+            # Sleep through the expected sweep time, then poll slowly until the laser is idle again
+            time.sleep(duration)
+            while True:
+                # With sweep reporting on, step reports arrive during the sweep and would be read as the
+                # status reply, so the complete ones are set aside for get_sweep_report first
+                self._stash_reports()
+                if self.get_laser_sweep_status() == self.sweep_idle_status:
+                    break
+                if time.monotonic() >= deadline:
+                    raise TimeoutError(f"Stepped sweep from {start} to {stop} pm did not finish within {duration + timeout_margin:.1f} s")
+                time.sleep(poll_interval)
+
+    def get_sweep_report(self):
+        # Returns the step reports received since the last call without querying the laser, needs
+        # set_laser_sweep_reporting(True). An unfinished report stays buffered for the next call.
+        if not self.connection:
+            raise RuntimeError("Not connected to TLX3.")
+
+        self._read_pending()
+        reports = self._reports + self._split_reports()
+        self._reports = []
+        return reports
+
+    def _read_pending(self):
+        # Appends whatever the port has already received to self._rx without waiting
+        if self._fd is None:
+            self._rx += self.connection.read(self.connection.in_waiting)
+            return
+        while select.select([self._fd], [], [], 0)[0]:
+            try:
+                data = os.read(self._fd, 4096)
+            except BlockingIOError:
+                break
+            if not data:
+                break
+            self._rx += data
+
+    def _stash_reports(self):
+        # Moves the complete lines received so far to the reports returned by get_sweep_report
+        self._read_pending()
+        self._reports += self._split_reports()
+
+    def _split_reports(self):
+        # Removes the complete lines from self._rx and returns them, keeping an unfinished line
+        *reports, rest = self._rx.split(b'\r')
+        self._rx = bytearray(rest)
+        return [report.decode().strip() for report in reports if report.strip()]
+
     def set_stop_sweep(self):
-        response = self.send_command("LASer:SWeep:STOP")
+        response = self._send_raw(_CMD_STOP_SWEEP)
         return response
     
     def set_wavelength(self, wavelength):
-        # wavelength is in pm
-        response = self.send_command(f"LASer:WAVElength: {wavelength}")
+        # wavelength is in pm, a whole number given as an int, an integral float or a str
+        response = self._send_raw(b"LASer:WAVElength: %d\r" % _as_int("wavelength", wavelength))
         return response
     
     def get_wavelength(self):
-        response = self.send_command("LASer:WAVElength?")
+        response = self._send_raw(_CMD_WAVELENGTH)
         return response
     
     def get_bootloader_version(self):
-        response = self.send_command("SYS:BVER?")
+        response = self._query_fixed(_CMD_BOOTLOADER_VERSION)
         return response
     
     def get_application_version(self):
-        response = self.send_command("SYS:AVER?")
+        response = self._query_fixed(_CMD_APPLICATION_VERSION)
         return response
     
     def get_laser_version(self):
-        response = self.send_command("SYS:LVER?")
+        response = self._query_fixed(_CMD_LASER_VERSION)
         return response
     
     def get_part_name(self):
-        response = self.send_command("SYS:PARTNAME?")
+        response = self._query_fixed(_CMD_PART_NAME)
         return response
     
     def get_product_name(self):
-        response = self.send_command("SYS:PRODNAME?")
+        response = self._query_fixed(_CMD_PRODUCT_NAME)
         return response
     
     def get_serial_number(self):
-        response = self.send_command("SYS:SERNUM?")
+        response = self._query_fixed(_CMD_SERIAL_NUMBER)
         return response
     
@@ -1,5 +1,101 @@
 from pyueye import ueye
+import ctypes
 import numpy as np
+import sys
+import threading
+
+try:
+    import cv2
+except ImportError:
+    cv2 = None
+
+# Bits per pixel of each color mode
+_BITS_PER_PIXEL = {
+    ueye.IS_CM_SENSOR_RAW8: 8,
+    ueye.IS_CM_SENSOR_RAW10: 16,
+    ueye.IS_CM_SENSOR_RAW12: 16,
+    ueye.IS_CM_SENSOR_RAW16: 16,
+    ueye.IS_CM_MONO8: 8,
+    ueye.IS_CM_RGB8_PACKED: 24,
+    ueye.IS_CM_BGR8_PACKED: 24,
+    ueye.IS_CM_RGBA8_PACKED: 32,
+    ueye.IS_CM_BGRA8_PACKED: 32,
+    ueye.IS_CM_BGR10_PACKED: 32,
+    ueye.IS_CM_RGB10_PACKED: 32,
+    ueye.IS_CM_BGRA12_UNPACKED: 64,
+    ueye.IS_CM_BGR12_UNPACKED: 48,
+    ueye.IS_CM_BGRY8_PACKED: 32,
+    ueye.IS_CM_BGR565_PACKED: 16,
+    ueye.IS_CM_BGR5_PACKED: 16,
+    ueye.IS_CM_UYVY_PACKED: 16,
+    ueye.IS_CM_UYVY_MONO_PACKED: 16,
+    ueye.IS_CM_UYVY_BAYER_PACKED: 16,
+    ueye.IS_CM_CBYCRY_PACKED: 16,
+}
+# Right shift that reduces the 16-bit samples of the high bit depth modes to 8 bits
+_SHIFT_TO_8BIT = {
+    ueye.IS_CM_SENSOR_RAW10: 2,
+    ueye.IS_CM_SENSOR_RAW12: 4,
+    ueye.IS_CM_SENSOR_RAW16: 8,
+    ueye.IS_CM_BGR12_UNPACKED: 4,
+    ueye.IS_CM_BGRA12_UNPACKED: 4,
+}
+
+# Raw sensor modes, converted with the demosaicing code of the sensor's Bayer pattern
+_RAW_MODES = frozenset([
+    ueye.IS_CM_SENSOR_RAW8,
+    ueye.IS_CM_SENSOR_RAW10,
+    ueye.IS_CM_SENSOR_RAW12,
+    ueye.IS_CM_SENSOR_RAW16,
+])
+# OpenCV demosaicing to RGB of each Bayer pattern, named by the first two pixels of the top row
+_BAYER_CONVERSION = {} if cv2 is None else {
+    'RG': cv2.COLOR_BayerRG2RGB,
+    'BG': cv2.COLOR_BayerBG2RGB,
+    'GR': cv2.COLOR_BayerGR2RGB,
+    'GB': cv2.COLOR_BayerGB2RGB,
+}
+# Bayer pattern of each SENSORINFO.nUpperLeftBayerPixel value (BAYER_PIXEL_RED, _GREEN and _BLUE in uEye.h).
+# The sensor info does not tell the two green-first patterns apart, pass bayer_pattern='GB' to get_image_rgb if needed.
+_UPPER_LEFT_BAYER_PATTERN = {0: 'RG', 1: 'GR', 2: 'BG'}
+
+# OpenCV conversion to RGB of each other color mode, after reducing it to 8 bits
+_RGB_CONVERSION = {} if cv2 is None else {
+    ueye.IS_CM_MONO8: cv2.COLOR_GRAY2RGB,
+    ueye.IS_CM_BGR8_PACKED: cv2.COLOR_BGR2RGB,
+    ueye.IS_CM_RGBA8_PACKED: cv2.COLOR_RGBA2RGB,
+    ueye.IS_CM_BGRA8_PACKED: cv2.COLOR_BGRA2RGB,
+    ueye.IS_CM_BGR12_UNPACKED: cv2.COLOR_BGR2RGB,
+    ueye.IS_CM_BGRA12_UNPACKED: cv2.COLOR_BGRA2RGB,
+    ueye.IS_CM_UYVY_PACKED: cv2.COLOR_YUV2RGB_UYVY,
+}
+
+# Linux madvise advice asking for transparent huge pages
+_MADV_HUGEPAGE = 14
+
+
+def _prefault(mem_ptr, size):
+    """
+    Commit the pages of an image memory so the first frames do not pay for page faults.
+
+    :param mem_ptr: The image memory returned by is_AllocImageMem.
+    :type mem_ptr: ueye.c_mem_p
+    :param size: The number of bytes to commit.
+    :type size: int
+    """
+    address = ctypes.cast(mem_ptr, ctypes.c_void_p).value
+    if sys.platform.startswith('linux'):
+        try:
+            # Fewer TLB misses on multi-megabyte frames, madvise needs a page aligned start
+            page = 4096
+            start = address - address % page
+            libc = ctypes.CDLL(None)
+            libc.madvise(ctypes.c_void_p(start), ctypes.c_size_t(size + address - start), _MADV_HUGEPAGE)
+        except (OSError, AttributeError):
+            pass
+    # Writing every byte once faults in every page, the contents are replaced by the first frame anyway
+    ctypes.memset(address, 0, size)
+
 
 class UYECAM:
     """Wrapper class for controlling uEye cameras."""
@@ -9,6 +105,21 @@ class UYECAM:
         self.pc_image_memory = ueye.c_mem_p()
         self.mem_id = ueye.int()
         self.pitch = ueye.int()
+        self._image_buffer = None
+        self.width = None
+        self.height = None
+        self.colormode = None
+        self.bitsppixel = None
+        self.seq_mem_ptrs = []
+        self.seq_mem_ids = []
+        self._stream_thread = None
+        self._stream_stop = threading.Event()
+        self._frame_ready = threading.Event()
+        self._latest = None
+        self._stream_error = None
+        self._frame_pool = []
+        self._pool_index = 0
+        self._bayer_pattern = None
 
     def connect(self):
         """
@@ -40,6 +151,24 @@ class UYECAM:
         ret = ueye.is_GetSensorInfo(self.h_cam, s_info)
         self.__check_error(ret)
         return s_info.strSensorName.decode('utf-8')
+
+    def get_bayer_pattern(self):
+        """
+        Get the Bayer pattern of the sensor from its upper left pixel. The sensor info is read once and cached.
+
+        :return: 'RG', 'GR' or 'BG', named by the first two pixels of the top row.
+        :rtype: str
+        """
+        if self._bayer_pattern is None:
+            s_info = ueye.SENSORINFO()
+            ret = ueye.is_GetSensorInfo(self.h_cam, s_info)
+            self.__check_error(ret)
+            pixel = s_info.nUpperLeftBayerPixel.value
+            # The field is a char, which ctypes hands back as bytes
+            if isinstance(pixel, bytes):
+                pixel = ord(pixel)
+            self._bayer_pattern = _UPPER_LEFT_BAYER_PATTERN.get(pixel, 'RG')
+        return self._bayer_pattern
     
     def reset_to_default(self):
         """
@@ -47,6 +176,10 @@ class UYECAM:
         """
         ret = ueye.is_ResetToDefault(self.h_cam)
         self.__check_error(ret)
+        self.width = None
+        self.height = None
+        self.colormode = None
+        self.bitsppixel = None
 
     def get_aoi(self):
         """
@@ -83,6 +216,19 @@ class UYECAM:
         rect_aoi.s32Height = ueye.int(height)
         ret = ueye.is_AOI(self.h_cam, ueye.IS_AOI_IMAGE_SET_AOI, rect_aoi, ueye.sizeof(rect_aoi))
         self.__check_error(ret)
+        # The camera rounds the AOI to its step sizes, so remember the size it actually applied
+        _, _, self.width, self.height = self.get_aoi()
+
+    def refresh_geometry(self):
+        """
+        Read the AOI size and color mode back from the camera.
+
+        They are otherwise remembered from set_aoi and set_colormode, so only call this after changing
+        them outside the wrapper.
+        """
+        _ , _, self.width, self.height = self.get_aoi()
+        self.colormode = self.get_colormode()
+        self.bitsppixel = self.get_bits_per_pixel(self.colormode)
 
     def get_colormode(self):
         """
@@ -103,13 +249,20 @@ class UYECAM:
         """
         ret = ueye.is_SetColorMode(self.h_cam, colormode)
         self.__check_error(ret)
+        self.colormode = colormode
+        # None for a mode missing from the table, the camera is asked again then
+        self.bitsppixel = _BITS_PER_PIXEL.get(colormode)
 
-    def allocate_image_memory(self):
+    def allocate_image_memory(self, prefault=True):
         """
         Allocate memory for image data.
+
+        :param prefault: If True, commit the memory pages right away. This costs a few milliseconds once
+            and avoids page fault stalls while the first frames are grabbed. Default is True.
+        :type prefault: bool
         """
-        _ , _, self.width, self.height = self.get_aoi()
-        self.bitsppixel = self.get_bits_per_pixel(self.get_colormode())
+        if self.width is None or self.bitsppixel is None:
+            self.refresh_geometry()
         ret = ueye.is_AllocImageMem(self.h_cam, 
                                       self.width,
                                       self.height, 
@@ -119,7 +272,144 @@ class UYECAM:
 
 
         self.__check_error(ret)
+        if prefault:
+            _prefault(self.pc_image_memory, self.width * self.height * (self.bitsppixel // 8))
+
+    def allocate_image_sequence(self, n=3, prefault=True):
+        """
+        Allocate a ring of image memories so the camera can fill one while the others are read.
+
+        Frames are then read with get_next_image.
+
+        :param n: The number of image memories in the ring. Default is 3.
+        :type n: int
+        :param prefault: If True, commit the memory pages right away, see allocate_image_memory. Default is True.
+        :type prefault: bool
+        """
+        if self.width is None or self.bitsppixel is None:
+            self.refresh_geometry()
+
+        for _ in range(n):
+            mem_ptr = ueye.c_mem_p()
+            mem_id = ueye.int()
+            ret = ueye.is_AllocImageMem(self.h_cam,
+                                        self.width,
+                                        self.height,
+                                        self.bitsppixel,
+                                        mem_ptr,
+                                        mem_id)
+            self.__check_error(ret)
+            self.seq_mem_ptrs.append(mem_ptr)
+            self.seq_mem_ids.append(mem_id)
+            if prefault:
+                _prefault(mem_ptr, self.width * self.height * (self.bitsppixel // 8))
+            ret = ueye.is_AddToSequence(self.h_cam, mem_ptr, mem_id)
+            self.__check_error(ret)
+
+        ret = ueye.is_GetImageMemPitch(self.h_cam, self.pitch)
+        self.__check_error(ret)
+        ret = ueye.is_InitImageQueue(self.h_cam, 0)
+        self.__check_error(ret)
+
+    def get_next_image(self, timeout_ms=1000):
+        """
+        Wait for the next frame of the image sequence and return it as a NumPy array.
+
+        The array is a view of the image memory, which is handed back to the camera right away. It stays
+        valid until the camera has cycled through the other memories of the ring, copy it to keep a frame.
+
+        :param timeout_ms: The maximum time to wait for a frame in milliseconds. Default is 1000.
+        :type timeout_ms: int
+        :return: The image data as a NumPy array of shape (height, width, bytes per pixel).
+        :rtype: numpy.ndarray
+        """
+        mem_ptr = ueye.c_mem_p()
+        mem_id = ueye.int()
+        ret = ueye.is_WaitForNextImage(self.h_cam, timeout_ms, mem_ptr, mem_id)
+        self.__check_error(ret)
+
+        address = ctypes.cast(mem_ptr, ctypes.c_void_p).value
+        frame = self.__frame((ctypes.c_ubyte * (self.pitch.value * self.height)).from_address(address))
+
+        ret = ueye.is_UnlockSeqBuf(self.h_cam, mem_id, mem_ptr)
+        self.__check_error(ret)
+        return frame
+
+    def start_streaming(self):
+        """
+        Start reading frames of the image sequence on a background thread.
+
+        While streaming, get_latest returns the most recent frame without waiting for the camera, so the
+        caller can run at its own rate. allocate_image_sequence must have been called, with at least 3 memories.
+        """
+        if self._stream_thread is not None:
+            return
+        self._latest = None
+        self._stream_error = None
+        self._stream_stop.clear()
+        self._frame_ready.clear()
+        self._stream_thread = threading.Thread(target=self._poll_loop, daemon=True)
+        self._stream_thread.start()
 
+    def stop_streaming(self):
+        """
+        Stop the background reading started by start_streaming.
+        """
+        if self._stream_thread is None:
+            return
+        self._stream_stop.set()
+        self._stream_thread.join()
+        self._stream_thread = None
+
+    def get_latest(self, require_new=False, timeout=None):
+        """
+        Get the most recent frame read by start_streaming.
+
+        The frame is a view of its image memory, which stays locked until the next frame arrives and is
+        then returned to the camera. Copy the frame to keep it.
+
+        :param require_new: If True, wait for a frame that has not been returned yet. Default is False.
+        :type require_new: bool
+        :param timeout: Maximum time in seconds to wait for a new frame, None waits forever.
+        :type timeout: float
+        :return: The image data as a NumPy array, or None if no frame has been received yet or the wait timed out.
+        :rtype: numpy.ndarray
+        """
+        if require_new:
+            if not self._frame_ready.wait(timeout):
+                return None
+            self._frame_ready.clear()
+        if self._stream_error is not None:
+            self.__check_error(self._stream_error)
+        return self._latest
+
+    def _poll_loop(self):
+        """
+        Publish each new frame until stop_streaming is called, keeping only the latest one locked.
+        """
+        locked = None
+        while not self._stream_stop.is_set():
+            mem_ptr = ueye.c_mem_p()
+            mem_id = ueye.int()
+            # Short timeout so the stop flag is checked regularly
+            ret = ueye.is_WaitForNextImage(self.h_cam, 100, mem_ptr, mem_id)
+            if ret == ueye.IS_TIMED_OUT:
+                continue
+            if ret != ueye.IS_SUCCESS:
+                self._stream_error = ret
+                self._frame_ready.set()
+                break
+
+            address = ctypes.cast(mem_ptr, ctypes.c_void_p).value
+            # Replacing the reference is atomic, readers never see a partly published frame
+            self._latest = self.__frame((ctypes.c_ubyte * (self.pitch.value * self.height)).from_address(address))
+            self._frame_ready.set()
+            if locked is not None:
+                ueye.is_UnlockSeqBuf(self.h_cam, *locked)
+            locked = (mem_id, mem_ptr)
+
+        if locked is not None:
+            ueye.is_UnlockSeqBuf(self.h_cam, *locked)
 
     def capture_video(self, wait=False):
         """
@@ -139,8 +429,8 @@ class UYECAM:
         """
         Inquire the image memory.
         """
-        _ , _, self.width, self.height = self.get_aoi()
-        self.bitsppixel = self.get_bits_per_pixel(self.get_colormode())
+        if self.width is None or self.bitsppixel is None:
+            self.refresh_geometry()
  
         ret = ueye.is_InquireImageMem(self.h_cam, 
                                       self.pc_image_memory,
@@ -151,29 +441,94 @@ class UYECAM:
                                       self.pitch)
 
         self.__check_error(ret)
+        # ctypes array over the driver's image memory, so frames are read without a copy
+        address = ctypes.cast(self.pc_image_memory, ctypes.c_void_p).value
+        self._image_buffer = (ctypes.c_ubyte * (self.pitch.value * self.height)).from_address(address)
+
+    def allocate_frame_pool(self, pool_size=3):
+        """
+        Preallocate arrays that get_image_data(copy=True) fills in turn, so keeping frames does not
+        allocate memory on every grab.
 
-    def get_image_data(self):
+        A pooled array is reused pool_size frames later, so a frame must be finished with before then.
+
+        :param pool_size: The number of arrays in the pool. Default is 3.
+        :type pool_size: int
+        """
+        if self.width is None or self.bitsppixel is None:
+            self.refresh_geometry()
+        shape = (self.height, self.width, self.bitsppixel // 8)
+        self._frame_pool = [np.empty(shape, dtype=np.uint8) for _ in range(pool_size)]
+        self._pool_index = 0
+
+    def get_image_data(self, copy=False):
         """
         Get the image data as a NumPy array.
+
+        By default the array is a view of the camera's image memory, taken without copying. The next captured
+        frame overwrites it, so pass copy=True to keep a frame. inquire_image_mem must have been called.
         
-        :return: The image data as a NumPy array.
+        :param copy: If True, copy the frame into the next array of the frame pool, or into a new array
+            when allocate_frame_pool has not been called. Default is False.
+        :type copy: bool
+        :return: The image data as a NumPy array of shape (height, width, bytes per pixel).
         :rtype: numpy.ndarray
         """
-        array = ueye.get_data(self.pc_image_memory,
-                              self.width,
-                               self.height,
-                                 self.bitsppixel,
-                                 self.pitch,
-                                 copy=False)
-        bytes_per_pixel = int(self.bitsppixel / 8)
-
-        frame = np.reshape(array,
-                           (self.height, 
-                            self.width, 
-                            bytes_per_pixel))
-        
-        return frame
+        frame = self.__frame(self._image_buffer)
+        if not copy:
+            return frame
+        if not self._frame_pool:
+            return frame.copy()
+        dst = self._frame_pool[self._pool_index]
+        self._pool_index = (self._pool_index + 1) % len(self._frame_pool)
+        np.copyto(dst, frame)
+        return dst
     
+    def grab_into(self, dst):
+        """
+        Copy the current frame into a caller-owned array.
+
+        The copy is a single NumPy call that strips the row padding, so a frame can be kept without
+        allocating a new array each time.
+
+        :param dst: C-contiguous uint8 array of shape (height, width, bytes per pixel).
+        :type dst: numpy.ndarray
+        :return: dst, holding the frame.
+        :rtype: numpy.ndarray
+        """
+        frame = self.get_image_data()
+        if dst.dtype != np.uint8 or dst.shape != frame.shape or not dst.flags.c_contiguous:
+            raise ValueError(f"dst must be a C-contiguous uint8 array of shape {frame.shape}")
+        np.copyto(dst, frame)
+        return dst
+
+    def get_image_rgb(self, dst=None, bayer_pattern=None):
+        """
+        Get the image data converted to 8-bit RGB with OpenCV.
+
+        Bayer, mono, BGR(A), RGBA, UYVY and 10/12/16-bit modes are converted with cv2.cvtColor, high bit depths
+        are first shifted down to 8 bits. Without OpenCV, or for RGB8 which needs no conversion, the frame from
+        get_image_data is returned unchanged.
+
+        :param dst: Optional (height, width, 3) uint8 array reused for the result instead of allocating one per frame.
+        :type dst: numpy.ndarray
+        :param bayer_pattern: Bayer pattern of the raw modes, one of 'RG', 'BG', 'GR' and 'GB'. Read from the sensor info if not given.
+        :type bayer_pattern: str
+        :return: The image data as a NumPy array.
+        :rtype: numpy.ndarray
+        """
+        frame = self.get_image_data()
+        if self.colormode in _RAW_MODES and cv2 is not None:
+            code = _BAYER_CONVERSION[bayer_pattern or self.get_bayer_pattern()]
+        else:
+            code = _RGB_CONVERSION.get(self.colormode)
+        if code is None:
+            return frame
+        shift = _SHIFT_TO_8BIT.get(self.colormode)
+        if shift is not None:
+            frame = np.right_shift(frame.view(np.uint16), shift).astype(np.uint8)
+        return cv2.cvtColor(frame, code, dst=dst)
+
     def stop_video(self):
         """
         Stop capturing video with the camera.
@@ -183,12 +538,25 @@ class UYECAM:
 
     def free_image_memory(self):
         """
-        Free the allocated image memory.
-        """
-        ret = ueye.is_FreeImageMem(self.h_cam, 
-                                   self.pc_image_memory,
-                                     self.mem_id)
-        self.__check_error(ret)
+        Free the allocated image memory, including an image sequence.
+        """
+        self.stop_streaming()
+        if self.seq_mem_ids:
+            ret = ueye.is_ExitImageQueue(self.h_cam)
+            self.__check_error(ret)
+            ret = ueye.is_ClearSequence(self.h_cam)
+            self.__check_error(ret)
+            for mem_ptr, mem_id in zip(self.seq_mem_ptrs, self.seq_mem_ids):
+                ret = ueye.is_FreeImageMem(self.h_cam, mem_ptr, mem_id)
+                self.__check_error(ret)
+            self.seq_mem_ptrs = []
+            self.seq_mem_ids = []
+
+        if self.mem_id.value:
+            ret = ueye.is_FreeImageMem(self.h_cam, 
+                                       self.pc_image_memory,
+                                         self.mem_id)
+            self.__check_error(ret)
 
     def exit(self):
         """
@@ -207,30 +575,21 @@ class UYECAM:
         :return: The number of bits per pixel.
         :rtype: int
         """
-        bits_per_pixel = {
-            ueye.IS_CM_SENSOR_RAW8: 8,
-            ueye.IS_CM_SENSOR_RAW10: 16,
-            ueye.IS_CM_SENSOR_RAW12: 16,
-            ueye.IS_CM_SENSOR_RAW16: 16,
-            ueye.IS_CM_MONO8: 8,
-            ueye.IS_CM_RGB8_PACKED: 24,
-            ueye.IS_CM_BGR8_PACKED: 24,
-            ueye.IS_CM_RGBA8_PACKED: 32,
-            ueye.IS_CM_BGRA8_PACKED: 32,
-            ueye.IS_CM_BGR10_PACKED: 32,
-            ueye.IS_CM_RGB10_PACKED: 32,
-            ueye.IS_CM_BGRA12_UNPACKED: 64,
-            ueye.IS_CM_BGR12_UNPACKED: 48,
-            ueye.IS_CM_BGRY8_PACKED: 32,
-            ueye.IS_CM_BGR565_PACKED: 16,
-            ueye.IS_CM_BGR5_PACKED: 16,
-            ueye.IS_CM_UYVY_PACKED: 16,
-            ueye.IS_CM_UYVY_MONO_PACKED: 16,
-            ueye.IS_CM_UYVY_BAYER_PACKED: 16,
-            ueye.IS_CM_CBYCRY_PACKED: 16,        
-        } 
-        
-        return bits_per_pixel[color_mode]
+        return _BITS_PER_PIXEL[color_mode]
+
+    def __frame(self, image_buffer):
+        """
+        View an image memory as a (height, width, bytes per pixel) array without copying.
+
+        :param image_buffer: ctypes array covering pitch times height bytes of image memory.
+        :type image_buffer: ctypes.Array
+        :return: The image data as a NumPy array.
+        :rtype: numpy.ndarray
+        """
+        bytes_per_pixel = self.bitsppixel // 8
+        rows = np.frombuffer(image_buffer, dtype=np.uint8).reshape(self.height, self.pitch.value)
+        # Rows can be padded to the pitch, only the first width pixels of each row are image data
+        return rows[:, :self.width * bytes_per_pixel].reshape(self.height, self.width, bytes_per_pixel)
 
     def __check_error(self, ret):
         """